@@ -10,11 +10,11 @@ import platform
 from pathlib import Path
 
 
-def run_command(command, description):
-    """Run a command and handle errors."""
+def run_command(argv, description):
+    """Run a command (argv list) and handle errors."""
     print(f"🔄 {description}...")
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
+        result = subprocess.run(argv, check=True, capture_output=True, text=True)
         print(f"✅ {description} completed successfully")
         return True
     except subprocess.CalledProcessError as e:
@@ -39,7 +39,7 @@ def create_virtual_environment():
         print("✅ Virtual environment already exists")
         return True
     
-    return run_command("python -m venv venv", "Creating virtual environment")
+    return run_command([sys.executable, "-m", "venv", "venv"], "Creating virtual environment")
 
 
 def get_activation_command():
@@ -58,19 +58,12 @@ def install_dependencies():
     else:
         pip_cmd = "venv/bin/pip"
     
-    # Upgrade pip
-    if not run_command(f"{pip_cmd} install --upgrade pip", "Upgrading pip"):
-        return False
-    
-    # Install requirements
-    if not run_command(f"{pip_cmd} install -r requirements.txt", "Installing dependencies"):
-        return False
-    
-    # Install package in development mode
-    if not run_command(f"{pip_cmd} install -e .", "Installing package in development mode"):
-        return False
-    
-    return True
+    # Upgrade pip and install requirements plus the package (editable) in
+    # one pip invocation instead of paying pip's startup cost three times
+    return run_command(
+        [pip_cmd, "install", "--upgrade", "pip", "-r", "requirements.txt", "-e", "."],
+        "Installing dependencies and package in development mode"
+    )
 
 
 def main():
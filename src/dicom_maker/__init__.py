@@ -11,24 +11,30 @@ This package provides tools for:
 - Configuring study templates and PACS connections
 """
 
+import importlib
+
 __version__ = "0.1.0"
 __author__ = "flatmapit.com"
 __email__ = ""
 
-# Import main components for easy access
-from .cli import main
-from .dicom_generator import DICOMGenerator
-from .dicom_validator import DICOMFieldValidator
-from .image_generator import DICOMImageGenerator
-from .pacs_client import PACSClient
-from .study_manager import StudyManager
-from .export_manager import ExportManager
-from .logger import get_logger, setup_logging
+# Public names resolved lazily (PEP 562) so importing the package does not
+# drag in pydicom, pynetdicom, PIL, reportlab, etc. until actually needed
+_LAZY_IMPORTS = {
+    "main": ".cli",
+    "DICOMGenerator": ".dicom_generator",
+    "DICOMFieldValidator": ".dicom_validator",
+    "DICOMImageGenerator": ".image_generator",
+    "PACSClient": ".pacs_client",
+    "StudyManager": ".study_manager",
+    "ExportManager": ".export_manager",
+    "get_logger": ".logger",
+    "setup_logging": ".logger",
+}
 
 __all__ = [
     "main",
     "DICOMGenerator",
-    "DICOMFieldValidator", 
+    "DICOMFieldValidator",
     "DICOMImageGenerator",
     "PACSClient",
     "StudyManager",
@@ -36,3 +42,14 @@ __all__ = [
     "get_logger",
     "setup_logging",
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -11,10 +11,8 @@ import sys
 from pathlib import Path
 from typing import Optional
 
-from .dicom_generator import DICOMGenerator
-from .pacs_client import PACSClient
-from .study_manager import StudyManager
-from .export_manager import ExportManager
+# Heavy components (pynetdicom, numpy, reportlab, ...) are imported inside
+# the commands that need them so `--help`-style invocations stay fast
 from .logger import setup_logging, get_logger
 
 
@@ -25,9 +23,10 @@ from .logger import setup_logging, get_logger
 @click.pass_context
 def cli(ctx, log_file, log_level):
     """DICOM Maker - Create synthetic DICOM data and send to PACS systems."""
-    # Set up logging
+    # Set up logging and share the logger with subcommands via the context
     setup_logging(log_file, log_level)
     ctx.ensure_object(dict)
+    ctx.obj['logger'] = get_logger()
 
 
 @cli.command()
@@ -43,14 +42,18 @@ def cli(ctx, log_file, log_level):
 @click.option('--study-description', help='Study description')
 @click.option('--output-dir', default='studies', help='Output directory for studies')
 @click.option('--config', help='Configuration file path')
-def create(study_count: int, series_count: int, image_count: int, 
+@click.pass_context
+def create(ctx, study_count: int, series_count: int, image_count: int,
           modality: str, template: Optional[str], anatomical_region: str,
-          patient_id: Optional[str], patient_name: Optional[str], 
-          accession_number: Optional[str], study_description: Optional[str], 
+          patient_id: Optional[str], patient_name: Optional[str],
+          accession_number: Optional[str], study_description: Optional[str],
           output_dir: str, config: Optional[str]):
     """Create synthetic DICOM studies."""
+    logger = ctx.obj['logger']
     try:
-        logger = get_logger()
+        from .dicom_generator import DICOMGenerator
+        from .study_manager import StudyManager
+
         generator = DICOMGenerator()
         study_manager = StudyManager(output_dir)
         
@@ -74,27 +77,30 @@ def create(study_count: int, series_count: int, image_count: int,
                 modality=modality,
                 user_fields=user_fields,
                 anatomical_region=anatomical_region,
-                template=template
+                template=template,
+                writer=study_manager.write_image
             )
-            
-            # Save study to local storage
+
+            # Record study metadata (images were streamed to disk above)
             study_manager.save_study(study_id, generator.get_study(study_id))
             logger.success(f"Created study {study_id}")
         
         logger.success(f"Successfully created {study_count} study(ies) in {output_dir}/")
         
     except Exception as e:
-        logger = get_logger()
         logger.error(f"Error creating studies: {e}")
         sys.exit(1)
 
 
 @cli.command()
 @click.option('--output-dir', default='studies', help='Studies directory')
-def list_studies(output_dir: str):
+@click.pass_context
+def list_studies(ctx, output_dir: str):
     """List local DICOM studies."""
+    logger = ctx.obj['logger']
     try:
-        logger = get_logger()
+        from .study_manager import StudyManager
+
         study_manager = StudyManager(output_dir)
         studies = study_manager.list_studies()
         
@@ -102,21 +108,24 @@ def list_studies(output_dir: str):
             logger.info("No studies found.")
             return
         
-        logger.info(f"Found {len(studies)} study(ies):")
-        for study_id, study_info in studies.items():
-            logger.info(f"  {study_id}: {study_info}")
+        # Emit the whole listing in one call instead of one write per study
+        listing = "\n".join(f"  {study_id}: {study_info}"
+                            for study_id, study_info in studies.items())
+        logger.info(f"Found {len(studies)} study(ies):\n{listing}")
             
     except Exception as e:
-        logger = get_logger()
         logger.error(f"Error listing studies: {e}")
         sys.exit(1)
 
 
 @cli.command()
-def list_templates():
+@click.pass_context
+def list_templates(ctx):
     """List available study templates."""
+    logger = ctx.obj['logger']
     try:
-        logger = get_logger()
+        from .dicom_generator import DICOMGenerator
+
         generator = DICOMGenerator()
         templates = generator.get_available_templates()
         
@@ -125,7 +134,6 @@ def list_templates():
             logger.info(f"  {template}")
             
     except Exception as e:
-        logger = get_logger()
         logger.error(f"Error listing templates: {e}")
         sys.exit(1)
 
@@ -136,11 +144,15 @@ def list_templates():
 @click.option('--output-dir', help='Output directory for PNG export')
 @click.option('--output-file', help='Output file for PDF export')
 @click.option('--studies-dir', default='studies', help='Studies directory')
-def export(study_id: str, export_format: str, output_dir: Optional[str], 
+@click.pass_context
+def export(ctx, study_id: str, export_format: str, output_dir: Optional[str],
           output_file: Optional[str], studies_dir: str):
     """Export DICOM study to PNG or PDF format."""
+    logger = ctx.obj['logger']
     try:
-        logger = get_logger()
+        from .export_manager import ExportManager
+        from .study_manager import StudyManager
+
         study_manager = StudyManager(studies_dir)
         export_manager = ExportManager()
         
@@ -169,7 +181,6 @@ def export(study_id: str, export_format: str, output_dir: Optional[str],
                 sys.exit(1)
             
     except Exception as e:
-        logger = get_logger()
         logger.error(f"Error exporting study: {e}")
         sys.exit(1)
 
@@ -179,10 +190,13 @@ def export(study_id: str, export_format: str, output_dir: Optional[str],
 @click.option('--port', default=11112, help='PACS port')
 @click.option('--aec', required=True, help='Application Entity Caller')
 @click.option('--aet', required=True, help='Application Entity Title')
-def verify(host: str, port: int, aec: str, aet: str):
+@click.pass_context
+def verify(ctx, host: str, port: int, aec: str, aet: str):
     """Verify PACS connection with C-ECHO."""
+    logger = ctx.obj['logger']
     try:
-        logger = get_logger()
+        from .pacs_client import PACSClient
+
         pacs_client = PACSClient(host, port, aec, aet)
         
         logger.info(f"Verifying connection to {host}:{port}...")
@@ -195,7 +209,6 @@ def verify(host: str, port: int, aec: str, aet: str):
             sys.exit(1)
             
     except Exception as e:
-        logger = get_logger()
         logger.error(f"Error verifying connection: {e}")
         sys.exit(1)
 
@@ -206,29 +219,28 @@ def verify(host: str, port: int, aec: str, aet: str):
 @click.option('--port', default=11112, help='PACS port')
 @click.option('--aec', required=True, help='Application Entity Caller')
 @click.option('--aet', required=True, help='Application Entity Title')
+@click.option('--parallel', default=1, help='Number of parallel associations to use')
 @click.option('--output-dir', default='studies', help='Studies directory')
-def send(study_id: str, host: str, port: int, aec: str, aet: str, output_dir: str):
+@click.pass_context
+def send(ctx, study_id: str, host: str, port: int, aec: str, aet: str, parallel: int, output_dir: str):
     """Send DICOM study to PACS."""
+    logger = ctx.obj['logger']
     try:
-        logger = get_logger()
-        
-        # First verify connection
-        pacs_client = PACSClient(host, port, aec, aet)
-        logger.info("Verifying connection...")
-        if not pacs_client.verify_connection():
-            logger.failure("Connection verification failed!")
-            sys.exit(1)
-        
+        from .pacs_client import PACSClient
+        from .study_manager import StudyManager
+
+        pacs_client = PACSClient(host, port, aec, aet, max_associations=parallel)
+
         # Load study
         study_manager = StudyManager(output_dir)
         study = study_manager.load_study(study_id)
         if not study:
             logger.error(f"Study {study_id} not found!")
             sys.exit(1)
-        
-        # Send study
+
+        # Send study, verifying on the same association as the C-STOREs
         logger.info(f"Sending study {study_id} to {host}:{port}...")
-        success = pacs_client.send_study(study)
+        success = pacs_client.send_study(study, verify_first=True)
         
         if success:
             logger.success("Study sent successfully!")
@@ -237,7 +249,6 @@ def send(study_id: str, host: str, port: int, aec: str, aet: str, output_dir: st
             sys.exit(1)
             
     except Exception as e:
-        logger = get_logger()
         logger.error(f"Error sending study: {e}")
         sys.exit(1)
 
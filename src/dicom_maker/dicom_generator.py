@@ -6,8 +6,10 @@ Licensed under the MIT License
 """
 
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
+import numpy as np
 import pydicom
 from pydicom.dataset import Dataset
 from pydicom.uid import generate_uid
@@ -16,21 +18,96 @@ from .image_generator import DICOMImageGenerator
 from .logger import get_logger
 
 
+# SOP Class UID per modality; built once at import instead of per image
+_SOP_CLASS_BY_MODALITY = {
+    "CR": "1.2.840.10008.5.1.4.1.1.1",  # Computed Radiography Image Storage
+    "CT": "1.2.840.10008.5.1.4.1.1.2",  # CT Image Storage
+    "MR": "1.2.840.10008.5.1.4.1.1.4",  # MR Image Storage
+    "US": "1.2.840.10008.5.1.4.1.1.6",  # Ultrasound Image Storage
+    "MG": "1.2.840.10008.5.1.4.1.1.1.2", # Mammography Image Storage
+    "DX": "1.2.840.10008.5.1.4.1.1.1.1", # Digital X-Ray Image Storage for Presentation
+}
+_DEFAULT_SOP_CLASS = "1.2.840.10008.5.1.4.1.1.1"  # Default to CR
+
+# Study templates; static, so shared at module scope
+_STUDY_TEMPLATES = {
+    "chest-xray": {
+        "modality": "CR",
+        "anatomical_region": "chest",
+        "study_description": "Chest X-Ray",
+        "series_description": "PA Chest",
+        "rows": 512,
+        "columns": 512,
+    },
+    "ct-chest": {
+        "modality": "CT",
+        "anatomical_region": "chest",
+        "study_description": "CT Chest",
+        "series_description": "Axial CT Chest",
+        "rows": 512,
+        "columns": 512,
+    },
+    "ct-abdomen": {
+        "modality": "CT",
+        "anatomical_region": "abdomen",
+        "study_description": "CT Abdomen",
+        "series_description": "Axial CT Abdomen",
+        "rows": 512,
+        "columns": 512,
+    },
+    "mri-head": {
+        "modality": "MR",
+        "anatomical_region": "head",
+        "study_description": "MRI Head",
+        "series_description": "T1 Axial MRI",
+        "rows": 256,
+        "columns": 256,
+    },
+    "ultrasound-abdomen": {
+        "modality": "US",
+        "anatomical_region": "abdomen",
+        "study_description": "Ultrasound Abdomen",
+        "series_description": "Abdominal Ultrasound",
+        "rows": 480,
+        "columns": 640,
+    },
+    "mammography": {
+        "modality": "MG",
+        "anatomical_region": "chest",
+        "study_description": "Mammography",
+        "series_description": "CC View",
+        "rows": 1024,
+        "columns": 1024,
+    },
+}
+
+
 class DICOMGenerator:
     """Generates synthetic DICOM studies, series, and images."""
-    
+
+    # Series at or above this image count build their datasets on a
+    # thread pool; below it the pool overhead outweighs the win
+    PARALLEL_IMAGE_THRESHOLD = 8
+
+    # Retired pixel pools kept per byte length for reuse; caps the
+    # free-list so odd geometries cannot pin unbounded memory
+    POOL_FREELIST_MAX = 4
+
     def __init__(self):
         self.studies: Dict[str, Dict[str, Any]] = {}
         self.validator = DICOMFieldValidator()
         self.image_generator = DICOMImageGenerator()
         self.logger = get_logger()
+        self._pool_freelist: Dict[int, List[bytearray]] = {}
+        self._file_meta_templates: Dict[str, Dataset] = {}
     
-    def create_study(self, series_count: int = 1, image_count: int = 1, 
+    def create_study(self, series_count: int = 1, image_count: int = 1,
                     modality: str = "CR", user_fields: Optional[Dict[str, Any]] = None,
-                    anatomical_region: str = "chest", template: Optional[str] = None) -> str:
+                    anatomical_region: str = "chest", template: Optional[str] = None,
+                    writer: Optional[Callable[[str, int, Dataset], str]] = None) -> str:
         """
         Create a synthetic DICOM study.
-        
+
         Args:
             series_count: Number of series in the study
             image_count: Number of images per series
@@ -38,7 +115,10 @@ class DICOMGenerator:
             user_fields: User-specified DICOM field values
             anatomical_region: Anatomical region for image generation
             template: Study template name (optional)
-            
+            writer: Optional callback (study_uid, series_number, dataset)
+                that persists each image as it is generated; when given,
+                the study keeps file paths instead of in-memory datasets
+
         Returns:
             Study Instance UID
         """
@@ -50,127 +130,267 @@ class DICOMGenerator:
             template_fields = self._get_template_fields(template)
             user_fields = {**template_fields, **user_fields}
         
+        # Resolve the clock once per study instead of per field/image
+        now = datetime.now()
         study_uid = user_fields.get("study_uid", generate_uid())
-        study_date = user_fields.get("study_date", datetime.now().strftime("%Y%m%d"))
-        study_time = user_fields.get("study_time", datetime.now().strftime("%H%M%S"))
+        study_date = user_fields.get("study_date", now.strftime("%Y%m%d"))
+        study_time = user_fields.get("study_time", now.strftime("%H%M%S"))
         
+        # Study and series records stay plain dicts: they round-trip
+        # through StudyManager's JSON metadata and are consumed key-wise by
+        # the PACS and export code, and only one record exists per study or
+        # series (images are pydicom Datasets), so slotted classes would
+        # not reduce the footprint that matters here
         study_data = {
             "study_uid": study_uid,
             "study_date": study_date,
             "study_time": study_time,
-            "patient_id": user_fields.get("patient_id", str(uuid.uuid4())[:8]),
+            "patient_id": user_fields.get("patient_id", uuid.uuid4().hex[:8]),
             "patient_name": user_fields.get("patient_name", f"Patient_{study_uid[:8]}"),
             "series": []
         }
         
         self.logger.info(f"Creating study {study_uid} with {series_count} series, {image_count} images each")
-        
+
+        rows = user_fields.get("rows", 512)
+        columns = user_fields.get("columns", 512)
+        frame_bytes = rows * columns * 2  # 16 bits per pixel
+
+        # Derive series and image UIDs from one generated root with
+        # counter suffixes, so the entropy-hashing generate_uid call runs
+        # once per study instead of once per image
+        uid_root = generate_uid()
+        max_root_len = 64 - len(f".{series_count}.{image_count}")
+        if len(uid_root) > max_root_len:
+            uid_root = uid_root[:max_root_len].rstrip('.')
+
         # Create series
         for series_idx in range(series_count):
-            series_uid = generate_uid()
+            series_uid = f"{uid_root}.{series_idx + 1}"
             series_data = {
                 "series_uid": series_uid,
                 "series_number": series_idx + 1,
                 "modality": modality,
-                "images": []
+                "images": [],
+                "image_paths": []
             }
-            
+
             self.logger.progress(f"Creating series {series_idx + 1}/{series_count}")
-            
-            # Create images
-            for image_idx in range(image_count):
-                image_uid = generate_uid()
-                image_data = self._create_image_dataset(
-                    study_data, series_data, image_uid, image_idx + 1,
-                    user_fields, anatomical_region
+
+            # The study/series-constant validation inputs are identical for
+            # every image of the series; build them once and let each image
+            # add only its own UID and instance number
+            series_user_fields = {
+                "patient_id": study_data["patient_id"],
+                "patient_name": study_data["patient_name"],
+                "study_uid": study_data["study_uid"],
+                "study_date": study_data["study_date"],
+                "study_time": study_data["study_time"],
+                "series_uid": series_data["series_uid"],
+                "series_number": series_data["series_number"],
+                "modality": series_data["modality"],
+                **user_fields
+            }
+
+            # Validate once per series into a prototype dataset; every
+            # image clones it and fills only its own tags
+            prototype, dicom_metadata = self._build_series_prototype(
+                study_data, series_data, series_user_fields)
+
+            # Draw background noise for the series directly into one
+            # contiguous byte pool; per-image generation layers structures
+            # on the pooled frames and PixelData is sliced out without
+            # per-image tobytes() allocations. Pooling per series rather
+            # than per study bounds resident pixel memory to one series,
+            # which keeps the streaming writer path flat however many
+            # series the study has
+            pixel_pool = self._rent_pool(image_count * frame_bytes)
+            noise_batch = self.image_generator.batch_noise(
+                image_count, width=columns, height=rows,
+                anatomical_region=anatomical_region,
+                out=np.frombuffer(pixel_pool, dtype=np.uint16).reshape(
+                    image_count, rows, columns)
+            )
+            pool_view = memoryview(pixel_pool)
+
+            # Create images; each image owns a disjoint slice of the pixel
+            # pool and a fresh Dataset, so construction is independent and
+            # large series can fan out over a thread pool (NumPy releases
+            # the GIL for the heavy pixel work)
+            def build_image(image_idx: int) -> Dataset:
+                image_uid = f"{series_uid}.{image_idx + 1}"
+                return self._create_image_dataset(
+                    prototype, dicom_metadata, series_data,
+                    image_uid, image_idx + 1, anatomical_region,
+                    base=noise_batch[image_idx],
+                    pixel_buffer=pool_view[image_idx * frame_bytes:
+                                           (image_idx + 1) * frame_bytes]
                 )
-                series_data["images"].append(image_data)
-            
+
+            if image_count >= self.PARALLEL_IMAGE_THRESHOLD:
+                workers = min(8, image_count)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    built_images = executor.map(build_image, range(image_count))
+                    built_images = list(built_images)
+            else:
+                built_images = [build_image(image_idx)
+                                for image_idx in range(image_count)]
+
+            for image_data in built_images:
+                if writer is not None:
+                    # Persist immediately and drop the dataset so memory
+                    # stays flat regardless of study size
+                    path = writer(study_uid, series_data["series_number"], image_data)
+                    series_data["image_paths"].append(path)
+                else:
+                    series_data["images"].append(image_data)
+
+            # Every PixelData has been copied out of the pool by now, so
+            # the buffer can serve the next series or study
+            pool_view.release()
+            self._return_pool(pixel_pool)
+
             study_data["series"].append(series_data)
         
         self.studies[study_uid] = study_data
         self.logger.success(f"Created study {study_uid} with {len(study_data['series'])} series")
         return study_uid
     
-    def _create_image_dataset(self, study_data: Dict, series_data: Dict, 
-                            image_uid: str, instance_number: int,
-                            user_fields: Dict[str, Any], anatomical_region: str) -> Dataset:
-        """Create a DICOM dataset for an image."""
-        ds = Dataset()
-        
-        # Prepare user fields for validation
-        image_user_fields = {
-            "patient_id": study_data["patient_id"],
-            "patient_name": study_data["patient_name"],
-            "study_uid": study_data["study_uid"],
-            "study_date": study_data["study_date"],
-            "study_time": study_data["study_time"],
-            "series_uid": series_data["series_uid"],
-            "series_number": series_data["series_number"],
-            "modality": series_data["modality"],
-            "sop_instance_uid": image_uid,
-            "instance_number": instance_number,
-            **user_fields
-        }
-        
-        # Validate and generate patient fields
-        ds = self.validator.validate_and_generate(ds, image_user_fields, "patient")
-        
-        # Validate and generate study fields
-        ds = self.validator.validate_and_generate(ds, image_user_fields, "study")
-        
-        # Validate and generate series fields
-        ds = self.validator.validate_and_generate(ds, image_user_fields, "series")
-        
-        # Validate and generate image fields
-        ds = self.validator.validate_and_generate(ds, image_user_fields, "image")
-        
+    def _file_meta_for(self, sop_class_uid: str) -> Dataset:
+        """Build file meta for an image from a cached per-SOP-class template.
+
+        TransferSyntaxUID, ImplementationClassUID, and
+        MediaStorageSOPClassUID are identical for every image of a
+        modality, so their elements are created once and shared by
+        reference; MediaStorageSOPInstanceUID is deliberately absent from
+        the template so the caller's assignment creates a fresh element
+        per image.
+        """
+        template = self._file_meta_templates.get(sop_class_uid)
+        if template is None:
+            template = Dataset()
+            template.TransferSyntaxUID = pydicom.uid.ImplicitVRLittleEndian
+            template.MediaStorageSOPClassUID = sop_class_uid
+            template.ImplementationClassUID = pydicom.uid.PYDICOM_IMPLEMENTATION_UID
+            self._file_meta_templates[sop_class_uid] = template
+        meta = Dataset()
+        meta.update(template)
+        return meta
+
+    def _rent_pool(self, nbytes: int) -> bytearray:
+        """Take a pixel pool from the free-list or allocate a fresh one."""
+        pools = self._pool_freelist.get(nbytes)
+        if pools:
+            return pools.pop()
+        return bytearray(nbytes)
+
+    def _return_pool(self, pool: bytearray) -> None:
+        """Put a retired pixel pool back on the free-list (bounded)."""
+        pools = self._pool_freelist.setdefault(len(pool), [])
+        if len(pools) < self.POOL_FREELIST_MAX:
+            pools.append(pool)
+
+    def _build_series_prototype(self, study_data: Dict, series_data: Dict,
+                                series_user_fields: Dict[str, Any]) -> tuple:
+        """Build the image-invariant prototype dataset for a series.
+
+        Runs field validation once per series and prefills every tag that
+        is identical across the series' images. Per-image tags
+        (SOPInstanceUID, InstanceNumber, PixelData) are deliberately left
+        out so image clones assign fresh elements instead of mutating ones
+        shared with their siblings.
+
+        Returns:
+            (prototype dataset, burnt-in text metadata dict)
+        """
+        proto = Dataset()
+
+        fields = series_user_fields.copy()
+        # Placeholders satisfy the mandatory-field pass; dropped below
+        fields["sop_instance_uid"] = series_data["series_uid"]
+        fields["instance_number"] = 1
+        proto = self.validator.validate_and_generate_all(proto, fields)
+        del proto.SOPInstanceUID
+        del proto.InstanceNumber
+
         # Set SOP Class UID based on modality
-        ds.SOPClassUID = self._get_sop_class_uid(series_data["modality"])
-        
+        proto.SOPClassUID = self._get_sop_class_uid(series_data["modality"])
+
         # Add additional fields
-        ds.StudyID = study_data["study_uid"][:8]
-        ds.StudyDescription = user_fields.get("study_description", f"Synthetic Study {study_data['study_uid'][:8]}")
-        ds.SeriesDescription = user_fields.get("series_description", f"Synthetic Series {series_data['series_number']}")
-        
+        proto.StudyID = study_data["study_uid"][:8]
+        proto.StudyDescription = series_user_fields.get("study_description", f"Synthetic Study {study_data['study_uid'][:8]}")
+        proto.SeriesDescription = series_user_fields.get("series_description", f"Synthetic Series {series_data['series_number']}")
+
         # Image Properties
-        ds.Rows = user_fields.get("rows", 512)
-        ds.Columns = user_fields.get("columns", 512)
-        ds.BitsAllocated = 16
-        ds.BitsStored = 16
-        ds.HighBit = 15
-        ds.PixelRepresentation = 0
-        ds.SamplesPerPixel = 1
-        ds.PhotometricInterpretation = "MONOCHROME2"
-        
-        # Prepare metadata for burnt-in text
+        proto.Rows = series_user_fields.get("rows", 512)
+        proto.Columns = series_user_fields.get("columns", 512)
+        proto.BitsAllocated = 16
+        proto.BitsStored = 16
+        proto.HighBit = 15
+        proto.PixelRepresentation = 0
+        proto.SamplesPerPixel = 1
+        proto.PhotometricInterpretation = "MONOCHROME2"
+
+        # Metadata for burnt-in text; constant across the series
         dicom_metadata = {
-            'PatientName': ds.PatientName,
-            'PatientID': ds.PatientID,
-            'PatientBirthDate': ds.PatientBirthDate,
-            'StudyInstanceUID': ds.StudyInstanceUID,
-            'SeriesInstanceUID': ds.SeriesInstanceUID,
-            'Modality': ds.Modality,
-            'StudyDate': ds.StudyDate,
-            'AccessionNumber': ds.AccessionNumber,
+            'PatientName': proto.PatientName,
+            'PatientID': proto.PatientID,
+            'PatientBirthDate': proto.PatientBirthDate,
+            'StudyInstanceUID': proto.StudyInstanceUID,
+            'SeriesInstanceUID': proto.SeriesInstanceUID,
+            'Modality': proto.Modality,
+            'StudyDate': proto.StudyDate,
+            'AccessionNumber': proto.AccessionNumber,
         }
-        
+
+        return proto, dicom_metadata
+
+    def _create_image_dataset(self, prototype: Dataset, dicom_metadata: Dict,
+                            series_data: Dict, image_uid: str,
+                            instance_number: int, anatomical_region: str,
+                            base=None, pixel_buffer=None) -> Dataset:
+        """Create a DICOM dataset for an image.
+
+        `prototype` carries the validated, image-invariant tags built once
+        per series (see _build_series_prototype); the clone shares those
+        elements and assigns only its own. `base` optionally carries this
+        image's slice of the study's batched background noise (see
+        DICOMImageGenerator.batch_noise) and `pixel_buffer` the matching
+        memoryview slice of the shared byte pool backing it.
+        """
+        # Shallow clone: invariant DataElements are shared by reference,
+        # and the per-image tags below are absent from the prototype, so
+        # adding them creates fresh elements in this dataset only.
+        # add_new with explicit tag/VR skips the keyword-to-tag resolution
+        # Dataset.__setattr__ performs on every assignment
+        ds = Dataset()
+        ds.update(prototype)
+        ds.add_new(0x00080018, "UI", image_uid)       # SOPInstanceUID
+        ds.add_new(0x00200013, "IS", instance_number)  # InstanceNumber
+
         # Generate realistic pixel data with burnt-in text
         pixel_data = self.image_generator.generate_image(
             width=ds.Columns,
             height=ds.Rows,
             modality=series_data["modality"],
             anatomical_region=anatomical_region,
-            dicom_metadata=dicom_metadata
+            dicom_metadata=dicom_metadata,
+            base=base
         )
-        ds.PixelData = pixel_data.tobytes()
+        if base is not None and pixel_buffer is not None:
+            if pixel_data is not base:
+                # Post-processing produced a new array; fold it back into
+                # the pooled frame so the slice below sees final pixels
+                base[:] = pixel_data
+            ds.add_new(0x7FE00010, "OW", bytes(pixel_buffer))  # PixelData
+        else:
+            ds.add_new(0x7FE00010, "OW", pixel_data.tobytes())
         
-        # Transfer Syntax - must be set before adding to dataset
-        ds.file_meta = Dataset()
-        ds.file_meta.TransferSyntaxUID = pydicom.uid.ImplicitVRLittleEndian
-        ds.file_meta.MediaStorageSOPClassUID = ds.SOPClassUID
-        ds.file_meta.MediaStorageSOPInstanceUID = ds.SOPInstanceUID
-        ds.file_meta.ImplementationClassUID = pydicom.uid.PYDICOM_IMPLEMENTATION_UID
+        # Transfer Syntax - must be set before adding to dataset; the
+        # invariant elements come from a per-SOP-class template and only
+        # the per-image MediaStorageSOPInstanceUID is assigned fresh
+        ds.file_meta = self._file_meta_for(ds.SOPClassUID)
+        ds.file_meta.add_new(0x00020003, "UI", image_uid)  # MediaStorageSOPInstanceUID
         
         # Set the transfer syntax in the dataset
         ds.is_implicit_VR = True
@@ -180,77 +400,15 @@ class DICOMGenerator:
     
     def _get_sop_class_uid(self, modality: str) -> str:
         """Get SOP Class UID based on modality."""
-        sop_class_mapping = {
-            "CR": "1.2.840.10008.5.1.4.1.1.1",  # Computed Radiography Image Storage
-            "CT": "1.2.840.10008.5.1.4.1.1.2",  # CT Image Storage
-            "MR": "1.2.840.10008.5.1.4.1.1.4",  # MR Image Storage
-            "US": "1.2.840.10008.5.1.4.1.1.6",  # Ultrasound Image Storage
-            "MG": "1.2.840.10008.5.1.4.1.1.1.2", # Mammography Image Storage
-            "DX": "1.2.840.10008.5.1.4.1.1.1.1", # Digital X-Ray Image Storage for Presentation
-        }
-        return sop_class_mapping.get(modality, "1.2.840.10008.5.1.4.1.1.1") # Default to CR
-    
+        return _SOP_CLASS_BY_MODALITY.get(modality, _DEFAULT_SOP_CLASS)
+
     def _get_template_fields(self, template: str) -> Dict[str, Any]:
         """Get template fields for a study template."""
-        templates = {
-            "chest-xray": {
-                "modality": "CR",
-                "anatomical_region": "chest",
-                "study_description": "Chest X-Ray",
-                "series_description": "PA Chest",
-                "rows": 512,
-                "columns": 512,
-            },
-            "ct-chest": {
-                "modality": "CT",
-                "anatomical_region": "chest",
-                "study_description": "CT Chest",
-                "series_description": "Axial CT Chest",
-                "rows": 512,
-                "columns": 512,
-            },
-            "ct-abdomen": {
-                "modality": "CT",
-                "anatomical_region": "abdomen",
-                "study_description": "CT Abdomen",
-                "series_description": "Axial CT Abdomen",
-                "rows": 512,
-                "columns": 512,
-            },
-            "mri-head": {
-                "modality": "MR",
-                "anatomical_region": "head",
-                "study_description": "MRI Head",
-                "series_description": "T1 Axial MRI",
-                "rows": 256,
-                "columns": 256,
-            },
-            "ultrasound-abdomen": {
-                "modality": "US",
-                "anatomical_region": "abdomen",
-                "study_description": "Ultrasound Abdomen",
-                "series_description": "Abdominal Ultrasound",
-                "rows": 480,
-                "columns": 640,
-            },
-            "mammography": {
-                "modality": "MG",
-                "anatomical_region": "chest",
-                "study_description": "Mammography",
-                "series_description": "CC View",
-                "rows": 1024,
-                "columns": 1024,
-            },
-        }
-        
-        return templates.get(template, {})
-    
+        return _STUDY_TEMPLATES.get(template, {})
+
     def get_available_templates(self) -> List[str]:
         """Get list of available study templates."""
-        return list(self._get_template_fields("").keys()) if hasattr(self, '_templates') else [
-            "chest-xray", "ct-chest", "ct-abdomen", "mri-head", 
-            "ultrasound-abdomen", "mammography"
-        ]
+        return list(_STUDY_TEMPLATES)
     
     def get_study(self, study_uid: str) -> Optional[Dict[str, Any]]:
         """Get study data by UID."""
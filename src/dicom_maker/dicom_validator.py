@@ -5,8 +5,11 @@ Copyright (c) 2025 flatmapit.com
 Licensed under the MIT License
 """
 
+import re
+import secrets
 import uuid
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, Any, Optional, List, Tuple
 import pydicom
 from pydicom.dataset import Dataset
@@ -14,6 +17,55 @@ from pydicom.uid import generate_uid
 from .logger import log_dicom_field_generation
 
 
+# Internal (non-DICOM) keys passed around in user_fields; checked for every
+# user field on every image, so membership must be O(1)
+_NON_DICOM_FIELDS = frozenset({
+    'patient_name', 'patient_id', 'study_uid', 'study_date',
+    'study_time', 'accession_number', 'series_uid', 'series_number',
+    'modality', 'sop_instance_uid', 'instance_number', 'study_description',
+    'series_description', 'rows', 'columns',
+})
+
+# Digits and dots only; avoids the temporary string that
+# value.replace(".", "").isdigit() allocates per UID check
+_UID_RE = re.compile(r"^[\d.]+$")
+
+# SOP Class UID per modality; rebuilt-once table since the lookup runs
+# for every generated image
+_SOP_CLASS_BY_MODALITY = {
+    "CR": "1.2.840.10008.5.1.4.1.1.1",  # Computed Radiography Image Storage
+    "CT": "1.2.840.10008.5.1.4.1.1.2",  # CT Image Storage
+    "MR": "1.2.840.10008.5.1.4.1.1.4",  # MR Image Storage
+    "US": "1.2.840.10008.5.1.4.1.1.6.1", # Ultrasound Image Storage
+    "DX": "1.2.840.10008.5.1.4.1.1.1.1", # Digital X-Ray Image Storage
+    "NM": "1.2.840.10008.5.1.4.1.1.20",  # Nuclear Medicine Image Storage
+    "PT": "1.2.840.10008.5.1.4.1.1.128", # Positron Emission Tomography Image Storage
+    "RF": "1.2.840.10008.5.1.4.1.1.6",   # Radiofluoroscopic Image Storage
+    "SC": "1.2.840.10008.5.1.4.1.1.7",   # Secondary Capture Image Storage
+    "MG": "1.2.840.10008.5.1.4.1.1.1.2", # Mammography Image Storage
+    "XA": "1.2.840.10008.5.1.4.1.1.12.1", # X-Ray Angiographic Image Storage
+    "XC": "1.2.840.10008.5.1.4.1.1.1.3", # External Camera Photography Storage
+}
+
+# Map DICOM keyword -> tag for validation lookups
+_FIELD_TO_TAG = {
+    "PatientName": "0010,0010",
+    "PatientID": "0010,0020",
+    "PatientBirthDate": "0010,0030",
+    "PatientSex": "0010,0040",
+    "StudyInstanceUID": "0020,000D",
+    "StudyDate": "0008,0020",
+    "StudyTime": "0008,0030",
+    "AccessionNumber": "0008,0050",
+    "SeriesInstanceUID": "0020,000E",
+    "SeriesNumber": "0020,0011",
+    "Modality": "0008,0060",
+    "SOPInstanceUID": "0008,0018",
+    "SOPClassUID": "0008,0016",
+    "InstanceNumber": "0020,0013",
+}
+
+
 class DICOMFieldValidator:
     """Validates and generates DICOM fields according to DICOM 3.0 standard."""
     
@@ -41,6 +93,14 @@ class DICOMFieldValidator:
             "0020,0013": "InstanceNumber",
         }
     }
+
+    # Mandatory fields of every module flattened into one list so a whole
+    # image can be validated in a single pass
+    ALL_MANDATORY_FIELDS = [
+        (module, tag, field_name)
+        for module, fields in MANDATORY_FIELDS.items()
+        for tag, field_name in fields.items()
+    ]
     
     # Field validation rules
     FIELD_RULES = {
@@ -91,10 +151,7 @@ class DICOMFieldValidator:
         # Process user-specified fields
         for field_name, value in user_fields.items():
             # Skip non-DICOM fields (like patient_name, study_uid, etc.)
-            if field_name in ['patient_name', 'patient_id', 'study_uid', 'study_date', 
-                            'study_time', 'accession_number', 'series_uid', 'series_number', 
-                            'modality', 'sop_instance_uid', 'instance_number', 'study_description',
-                            'series_description', 'rows', 'columns']:
+            if field_name in _NON_DICOM_FIELDS:
                 continue
                 
             if self._is_valid_field(field_name, value):
@@ -107,167 +164,136 @@ class DICOMFieldValidator:
         
         return dataset
     
+    def validate_and_generate_all(self, dataset: Dataset,
+                                  user_fields: Dict[str, Any]) -> Dataset:
+        """
+        Validate and generate the mandatory fields of every module at once.
+
+        Equivalent to calling validate_and_generate for patient, study,
+        series, and image in turn, but the mandatory fields are filled from
+        one flattened list and user_fields is iterated exactly once.
+
+        Args:
+            dataset: DICOM dataset to validate
+            user_fields: User-specified field values
+
+        Returns:
+            Validated dataset with generated fields
+        """
+        # Fill mandatory fields across all modules
+        for module, tag, field_name in self.ALL_MANDATORY_FIELDS:
+            if not hasattr(dataset, field_name):
+                generated_value = self._generate_field(tag, field_name, user_fields, module)
+                setattr(dataset, field_name, generated_value)
+                log_dicom_field_generation(tag, field_name, str(generated_value))
+
+        # Process user-specified fields once
+        for field_name, value in user_fields.items():
+            if field_name in _NON_DICOM_FIELDS:
+                continue
+
+            if self._is_valid_field(field_name, value):
+                setattr(dataset, field_name, value)
+            else:
+                generated_value = self._generate_field(field_name, field_name, user_fields, "image")
+                setattr(dataset, field_name, generated_value)
+                log_dicom_field_generation(field_name, field_name, str(generated_value), "invalid user value")
+
+        return dataset
+
     def _is_valid_field(self, field_name: str, value: Any) -> bool:
-        """Check if a field value is valid according to DICOM rules."""
-        # Map field names to tags for validation
-        field_to_tag = {
-            "PatientName": "0010,0010",
-            "PatientID": "0010,0020",
-            "PatientBirthDate": "0010,0030",
-            "PatientSex": "0010,0040",
-            "StudyInstanceUID": "0020,000D",
-            "StudyDate": "0008,0020",
-            "StudyTime": "0008,0030",
-            "AccessionNumber": "0008,0050",
-            "SeriesInstanceUID": "0020,000E",
-            "SeriesNumber": "0020,0011",
-            "Modality": "0008,0060",
-            "SOPInstanceUID": "0008,0018",
-            "SOPClassUID": "0008,0016",
-            "InstanceNumber": "0020,0013",
-        }
-        
-        tag = field_to_tag.get(field_name)
-        if not tag or tag not in self.FIELD_RULES:
+        """Check if a field value is valid according to DICOM rules.
+
+        In bulk creation the same user values recur identically for every
+        image of a study, so results are memoized per (field, value);
+        unhashable values fall through to a direct check.
+        """
+        try:
+            return _is_valid_field_cached(field_name, value)
+        except TypeError:
+            return self._check_field(field_name, value)
+
+    @staticmethod
+    def _check_field(field_name: str, value: Any) -> bool:
+        """Uncached validity check via the precompiled dispatch table."""
+        check = _FIELD_DISPATCH.get(field_name)
+        if check is None:
             return True  # Unknown fields are allowed
-        
-        rule = self.FIELD_RULES[tag]
-        
-        # Check type
-        if not isinstance(value, rule["type"]):
-            return False
-        
-        # Check required
-        if rule.get("required", False) and not value:
-            return False
-        
-        # Check max length
-        if "max_length" in rule and len(str(value)) > rule["max_length"]:
-            return False
-        
-        # Check allowed values
-        if "values" in rule and value not in rule["values"]:
-            return False
-        
-        # Check format
-        if "format" in rule:
-            if not self._validate_format(value, rule["format"]):
-                return False
-        
-        # Check min value
-        if "min" in rule and value < rule["min"]:
-            return False
-        
-        return True
-    
-    def _validate_format(self, value: str, format_type: str) -> bool:
-        """Validate field format."""
+        return check(value)
+
+    @staticmethod
+    def _validate_format(value: str, format_type: str) -> bool:
+        """Validate field format.
+
+        These are fixed-width digit formats, so plain length/digit/range
+        checks replace datetime.strptime -- no format-machine walk and no
+        exception raised and caught per bad value.
+        """
         if format_type == "YYYYMMDD":
-            try:
-                datetime.strptime(value, "%Y%m%d")
-                return True
-            except ValueError:
-                return False
+            return (len(value) == 8 and value.isdigit()
+                    and 1 <= int(value[4:6]) <= 12
+                    and 1 <= int(value[6:8]) <= 31)
         elif format_type == "HHMMSS":
-            try:
-                datetime.strptime(value, "%H%M%S")
-                return True
-            except ValueError:
-                return False
+            return (len(value) == 6 and value.isdigit()
+                    and int(value[:2]) <= 23
+                    and int(value[2:4]) <= 59
+                    and int(value[4:6]) <= 59)
         elif format_type == "uid":
             # Basic UID validation
-            return len(value) > 0 and value.replace(".", "").isdigit()
-        
+            return bool(_UID_RE.match(value))
+
         return True
     
-    def _generate_field(self, tag: str, field_name: str, user_fields: Dict[str, Any], 
+    def _generate_field(self, tag: str, field_name: str, user_fields: Dict[str, Any],
                        module: str) -> Any:
         """Generate a field value based on tag and context."""
-        if tag == "0010,0010":  # PatientName
-            return user_fields.get("patient_name", f"Patient_{uuid.uuid4().hex[:8]}")
-        elif tag == "0010,0020":  # PatientID
-            return user_fields.get("patient_id", str(uuid.uuid4())[:8])
-        elif tag == "0010,0030":  # PatientBirthDate
-            return user_fields.get("patient_birth_date", self._generate_random_dob())
-        elif tag == "0010,0040":  # PatientSex
-            return user_fields.get("patient_sex", "O")
-        elif tag == "0020,000D":  # StudyInstanceUID
-            return user_fields.get("study_uid", generate_uid())
-        elif tag == "0008,0020":  # StudyDate
-            return user_fields.get("study_date", datetime.now().strftime("%Y%m%d"))
-        elif tag == "0008,0030":  # StudyTime
-            return user_fields.get("study_time", datetime.now().strftime("%H%M%S"))
-        elif tag == "0008,0050":  # AccessionNumber
-            return user_fields.get("accession_number", self._generate_accession_number())
-        elif tag == "0020,000E":  # SeriesInstanceUID
-            return user_fields.get("series_uid", generate_uid())
-        elif tag == "0020,0011":  # SeriesNumber
-            return user_fields.get("series_number", 1)
-        elif tag == "0008,0060":  # Modality
-            return user_fields.get("modality", "CR")
-        elif tag == "0008,0018":  # SOPInstanceUID
-            return user_fields.get("sop_instance_uid", generate_uid())
-        elif tag == "0008,0016":  # SOPClassUID
-            return self._get_sop_class_uid(user_fields.get("modality", "CR"))
-        elif tag == "0020,0013":  # InstanceNumber
-            return user_fields.get("instance_number", 1)
-        else:
-            # Generate default value based on type
-            if tag in self.FIELD_RULES:
-                field_type = self.FIELD_RULES[tag]["type"]
-                if field_type == str:
-                    return f"Generated_{tag.replace(',', '_')}"
-                elif field_type == int:
-                    return 1
-            return "Generated"
+        generator = _FIELD_GENERATORS.get(tag)
+        if generator is not None:
+            return generator(self, user_fields)
+
+        # Generate default value based on type
+        if tag in self.FIELD_RULES:
+            field_type = self.FIELD_RULES[tag]["type"]
+            if field_type == str:
+                return f"Generated_{tag.replace(',', '_')}"
+            elif field_type == int:
+                return 1
+        return "Generated"
     
     def _get_sop_class_uid(self, modality: str) -> str:
         """Get SOP Class UID based on modality."""
-        sop_class_mapping = {
-            "CR": "1.2.840.10008.5.1.4.1.1.1",  # Computed Radiography Image Storage
-            "CT": "1.2.840.10008.5.1.4.1.1.2",  # CT Image Storage
-            "MR": "1.2.840.10008.5.1.4.1.1.4",  # MR Image Storage
-            "US": "1.2.840.10008.5.1.4.1.1.6.1", # Ultrasound Image Storage
-            "DX": "1.2.840.10008.5.1.4.1.1.1.1", # Digital X-Ray Image Storage
-            "NM": "1.2.840.10008.5.1.4.1.1.20",  # Nuclear Medicine Image Storage
-            "PT": "1.2.840.10008.5.1.4.1.1.128", # Positron Emission Tomography Image Storage
-            "RF": "1.2.840.10008.5.1.4.1.1.6",   # Radiofluoroscopic Image Storage
-            "SC": "1.2.840.10008.5.1.4.1.1.7",   # Secondary Capture Image Storage
-            "MG": "1.2.840.10008.5.1.4.1.1.1.2", # Mammography Image Storage
-            "XA": "1.2.840.10008.5.1.4.1.1.12.1", # X-Ray Angiographic Image Storage
-            "XC": "1.2.840.10008.5.1.4.1.1.1.3", # External Camera Photography Storage
-        }
-        return sop_class_mapping.get(modality, "1.2.840.10008.5.1.4.1.1.1")
+        return _SOP_CLASS_BY_MODALITY.get(modality, "1.2.840.10008.5.1.4.1.1.1")
     
-    def _generate_accession_number(self) -> str:
+    def _generate_accession_number(self, date_prefix: Optional[str] = None) -> str:
         """Generate a realistic accession number."""
         # Generate accession number in format: YYYYMMDD-XXXX
-        # Where YYYYMMDD is the current date and XXXX is a 4-digit sequence number
-        date_prefix = datetime.now().strftime("%Y%m%d")
-        sequence = str(uuid.uuid4().int % 10000).zfill(4)
-        return f"{date_prefix}-{sequence}"
+        # Where YYYYMMDD is the study date (or today) and XXXX is a 4-digit
+        # sequence number; passing the study date avoids a clock read per image
+        if not date_prefix:
+            date_prefix = datetime.now().strftime("%Y%m%d")
+        return f"{date_prefix}-{secrets.randbelow(10000):04d}"
     
     def _generate_random_dob(self) -> str:
         """Generate a random patient date of birth."""
-        import random
         from datetime import datetime, timedelta
-        
+
         # Generate random age between 18 and 80 years
         current_date = datetime.now()
         min_age = 18
         max_age = 80
-        
+
         # Calculate date range
         max_birth_date = current_date - timedelta(days=min_age * 365)
         min_birth_date = current_date - timedelta(days=max_age * 365)
-        
-        # Generate random date within range
+
+        # Generate random date within range, drawn from the same source
+        # as the accession sequence numbers
         time_between = max_birth_date - min_birth_date
         days_between = time_between.days
-        random_days = random.randint(0, days_between)
-        
+        random_days = secrets.randbelow(days_between + 1)
+
         random_birth_date = min_birth_date + timedelta(days=random_days)
-        
+
         return random_birth_date.strftime("%Y%m%d")
     
     def get_generated_fields(self) -> Dict[str, Any]:
@@ -277,3 +303,71 @@ class DICOMFieldValidator:
     def clear_generated_fields(self):
         """Clear the list of generated fields."""
         self.generated_fields.clear()
+
+
+def _compile_rule(rule: Dict[str, Any]):
+    """Compile one FIELD_RULES entry into a single check callable.
+
+    The rule's keys are resolved once here instead of on every call, so
+    the hot path is one dict lookup plus one function call rather than a
+    tag lookup, a rules lookup, and a branch cascade per field.
+    """
+    expected_type = rule["type"]
+    required = rule.get("required", False)
+    max_length = rule.get("max_length")
+    allowed = frozenset(rule["values"]) if "values" in rule else None
+    fmt = rule.get("format")
+    minimum = rule.get("min")
+
+    def check(value: Any) -> bool:
+        if not isinstance(value, expected_type):
+            return False
+        if required and not value:
+            return False
+        if max_length is not None and len(str(value)) > max_length:
+            return False
+        if allowed is not None and value not in allowed:
+            return False
+        if fmt is not None and not DICOMFieldValidator._validate_format(value, fmt):
+            return False
+        if minimum is not None and value < minimum:
+            return False
+        return True
+
+    return check
+
+
+# Dispatch tables precompiled at import: DICOM attribute name -> check
+# callable, and tag -> generator callable. Both replace per-call table
+# walks in the validation/generation hot path.
+_FIELD_DISPATCH = {
+    field_name: _compile_rule(DICOMFieldValidator.FIELD_RULES[tag])
+    for field_name, tag in _FIELD_TO_TAG.items()
+    if tag in DICOMFieldValidator.FIELD_RULES
+}
+
+_FIELD_GENERATORS = {
+    "0010,0010": lambda v, uf: uf.get("patient_name", f"Patient_{uuid.uuid4().hex[:8]}"),
+    "0010,0020": lambda v, uf: uf.get("patient_id", uuid.uuid4().hex[:8]),
+    "0010,0030": lambda v, uf: uf.get("patient_birth_date", v._generate_random_dob()),
+    "0010,0040": lambda v, uf: uf.get("patient_sex", "O"),
+    "0020,000D": lambda v, uf: uf.get("study_uid", generate_uid()),
+    "0008,0020": lambda v, uf: uf.get("study_date", datetime.now().strftime("%Y%m%d")),
+    "0008,0030": lambda v, uf: uf.get("study_time", datetime.now().strftime("%H%M%S")),
+    "0008,0050": lambda v, uf: uf.get("accession_number",
+                                      v._generate_accession_number(uf.get("study_date"))),
+    "0020,000E": lambda v, uf: uf.get("series_uid", generate_uid()),
+    "0020,0011": lambda v, uf: uf.get("series_number", 1),
+    "0008,0060": lambda v, uf: uf.get("modality", "CR"),
+    "0008,0018": lambda v, uf: uf.get("sop_instance_uid", generate_uid()),
+    "0008,0016": lambda v, uf: v._get_sop_class_uid(uf.get("modality", "CR")),
+    "0020,0013": lambda v, uf: uf.get("instance_number", 1),
+}
+
+
+# Memoized at module level because the rules are class constants: the
+# result depends only on (field_name, value), and hashable values recur
+# across every image of a bulk study
+@lru_cache(maxsize=256)
+def _is_valid_field_cached(field_name: str, value: Any) -> bool:
+    return DICOMFieldValidator._check_field(field_name, value)
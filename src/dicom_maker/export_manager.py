@@ -7,10 +7,86 @@ Licensed under the MIT License
 
 import os
 import json
+import logging
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 import numpy as np
+import PIL
 from PIL import Image
+
+# pillow-simd is a drop-in install-side replacement for pillow with
+# SIMD-accelerated inner loops (its versions carry a .postN suffix);
+# detect it so slow exports are explainable from the logs
+_PILLOW_SIMD = ".post" in getattr(PIL, "__version__", "")
+_pillow_simd_notice_shown = False
+
+# Optional: libspng-based encoder, several times faster than Pillow on
+# the uint8 grayscale frames exported here; Pillow remains the fallback
+try:
+    import pyspng
+except ImportError:
+    pyspng = None
+
+# Optional: C codecs that encode straight from ndarrays, skipping the
+# PIL image object entirely; preferred over pyspng when both exist
+try:
+    import imagecodecs
+except ImportError:
+    imagecodecs = None
+
+# Optional: much faster metadata serialization, same fallback pattern as
+# the study manager
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: JIT-compiled normalization kernel. On small frames the
+# NumPy expression's per-call overhead dominates the SIMD work; the
+# compiled loop fuses subtract/scale/cast into one pass with no float32
+# temporary. The NumPy path below remains the fallback.
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+    @numba.njit(cache=True, parallel=True, fastmath=True)
+    def _normalize_numba(src, dst, lo, hi):
+        scale = 255.0 / (hi - lo) if hi > lo else 0.0
+        for i in numba.prange(src.shape[0]):
+            for j in range(src.shape[1]):
+                dst[i, j] = np.uint8((src[i, j] - lo) * scale)
+else:
+    _normalize_numba = None
+
+_normalize_kernel_warmed = False
+
+
+def _warm_normalize_kernel() -> None:
+    """Trigger the numba JIT compile once, off the first real export."""
+    global _normalize_kernel_warmed
+    if _normalize_numba is not None and not _normalize_kernel_warmed:
+        _normalize_kernel_warmed = True
+        src = np.zeros((2, 2), np.uint16)
+        _normalize_numba(src, np.empty((2, 2), np.uint8), 0.0, 1.0)
+
+
+def _dump_json(path: Path, obj: Any) -> None:
+    """Serialize metadata to a file in one write.
+
+    orjson when available (C serializer, no per-value default callback
+    overhead for the common types), stdlib json otherwise; either way the
+    result is written with a single call instead of streaming through an
+    open file handle.
+    """
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2))
+    else:
+        path.write_text(json.dumps(obj, indent=2, default=str))
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
@@ -20,21 +96,194 @@ from pydicom.dataset import Dataset
 from .logger import get_logger
 
 
+# Labels and DICOM keywords written to each image's metadata text file
+_IMAGE_METADATA_FIELDS = [
+    ("Instance Number", "InstanceNumber"),
+    ("SOP Instance UID", "SOPInstanceUID"),
+    ("Modality", "Modality"),
+    ("Rows", "Rows"),
+    ("Columns", "Columns"),
+    ("Bits Allocated", "BitsAllocated"),
+    ("Bits Stored", "BitsStored"),
+    ("Photometric Interpretation", "PhotometricInterpretation"),
+    ("Patient Name", "PatientName"),
+    ("Patient ID", "PatientID"),
+    ("Patient DOB", "PatientBirthDate"),
+    ("Study Date", "StudyDate"),
+    ("Study Time", "StudyTime"),
+    ("Accession Number", "AccessionNumber"),
+]
+
+
+def _export_image_worker(item: tuple) -> tuple:
+    """Write one image's PNG and metadata text file.
+
+    Module-level and fed plain picklable values (raw pixel bytes plus
+    pre-extracted metadata strings) so it can run in worker processes --
+    PNG encoding is zlib-bound and does not scale across threads.
+
+    Args:
+        item: (pixel_bytes, shape, dtype_str, metadata, out_dir,
+            image_number, instance_number, compress_level, image_format,
+            lo, hi, bits_stored)
+
+    Returns:
+        (image_number, image path or None, error message or None)
+    """
+    (pixel_bytes, shape, dtype_str, metadata, out_dir,
+     image_number, instance_number, compress_level, image_format,
+     lo, hi, bits_stored) = item
+    try:
+        pixel_array = np.frombuffer(pixel_bytes, dtype=dtype_str).reshape(shape)
+        pixel_array = _normalize_to_uint8(pixel_array, lo=lo, hi=hi,
+                                          bits_stored=bits_stored)
+
+        # One join per image; both output names share the prefix
+        prefix = os.path.join(out_dir, f"image_{image_number:03d}")
+        png_path = f"{prefix}_instance_{instance_number}.{image_format}"
+        if image_format == "jpg":
+            # JPEG encodes an order of magnitude faster than PNG and the
+            # min-max normalization above is already lossy
+            if imagecodecs is not None:
+                with open(png_path, 'wb') as f:
+                    f.write(imagecodecs.jpeg_encode(pixel_array, level=85))
+            else:
+                _image_from_uint8(pixel_array).save(
+                    png_path, format='JPEG', quality=85, optimize=False)
+        elif imagecodecs is not None:
+            with open(png_path, 'wb') as f:
+                f.write(imagecodecs.png_encode(pixel_array, level=compress_level))
+        elif pyspng is not None and hasattr(pyspng, "encode_image"):
+            with open(png_path, 'wb') as f:
+                f.write(pyspng.encode_image(pixel_array))
+        else:
+            _image_from_uint8(pixel_array).save(
+                png_path, format='PNG', compress_level=compress_level)
+
+        metadata_path = f"{prefix}_metadata.txt"
+        # One join and one write instead of a write call per field
+        body = "\n".join(f"{label}: {value}" for label, value in metadata)
+        with open(metadata_path, 'w') as f:
+            f.write(f"DICOM Image Metadata\n====================\n\n{body}\n")
+
+        return image_number, png_path, None
+    except Exception as e:
+        return image_number, None, str(e)
+
+
+def _image_from_uint8(pixel_array: np.ndarray) -> Image.Image:
+    """Wrap a uint8 grayscale array as a PIL image without copying.
+
+    Image.fromarray revalidates the layout and may copy;
+    Image.frombuffer with raw mode aliases the array's memory directly,
+    which saves a full frame copy per export.
+    """
+    arr = np.ascontiguousarray(pixel_array)
+    height, width = arr.shape
+    return Image.frombuffer('L', (width, height), arr, 'raw', 'L', 0, 1)
+
+
+def _normalize_to_uint8(pixel_array: np.ndarray,
+                        lo: Optional[float] = None,
+                        hi: Optional[float] = None,
+                        bits_stored: Optional[int] = None) -> np.ndarray:
+    """Normalize pixel values to the 0-255 range in as few passes as possible.
+
+    The naive (a - min) / (max - min) * 255 expression walks the 16-bit
+    buffer four times through float64 temporaries; here the subtract
+    writes straight into one float32 buffer, the scale is folded into a
+    single in-place multiply, and only the final uint8 cast allocates.
+    A flat image (max == min) maps to all zeros instead of dividing by
+    zero.
+
+    When lo/hi are given they replace the per-frame min/max scan, so a
+    caller that already knows the series-wide window skips two full
+    passes per frame and every frame in the series shares one window.
+    With numba installed the whole subtract/scale/cast pipeline runs as
+    one compiled parallel pass instead.
+
+    bits_stored, when known from the dataset, unlocks pure-integer
+    paths: data already bounded to 8 bits needs only a cast, and
+    12-bit data (the common CT depth) maps down with one SIMD-friendly
+    right shift, skipping the float pipeline and the min/max scans.
+    """
+    if pixel_array.dtype == np.uint8:
+        return pixel_array
+    if bits_stored is not None and pixel_array.dtype.kind == 'u':
+        if bits_stored <= 8:
+            return pixel_array.astype(np.uint8)
+        if bits_stored <= 12:
+            return (pixel_array >> (bits_stored - 8)).astype(np.uint8)
+    if lo is None:
+        lo = pixel_array.min()
+    if hi is None:
+        hi = pixel_array.max()
+    if _normalize_numba is not None and pixel_array.ndim == 2:
+        dst = np.empty(pixel_array.shape, np.uint8)
+        _normalize_numba(np.ascontiguousarray(pixel_array), dst,
+                         float(lo), float(hi))
+        return dst
+    span = hi - lo
+    tmp = np.empty(pixel_array.shape, np.float32)
+    np.subtract(pixel_array, lo, out=tmp, dtype=np.float32)
+    if span:
+        tmp *= np.float32(255.0 / span)
+    return tmp.astype(np.uint8)
+
+
 class ExportManager:
     """Manages export of DICOM studies to various formats."""
-    
-    def __init__(self):
-        """Initialize the export manager."""
+
+    # Series at or above this image count encode PNGs on a process pool
+    PARALLEL_EXPORT_THRESHOLD = 4
+
+    def __init__(self, png_compress_level: int = 1, preview_dpi: int = 150):
+        """Initialize the export manager.
+
+        Args:
+            png_compress_level: zlib level for exported PNGs. Level 1 is
+                close to Pillow's default size on these grayscale frames
+                but markedly faster to encode; pass 6 for smaller
+                archival files
+            preview_dpi: resolution budget for images embedded in PDF
+                reports. They render at 4x4 inches on the page, so
+                frames are downscaled to 4 * preview_dpi pixels before
+                encoding instead of embedding the full-resolution frame
+        """
         self.logger = get_logger()
+        self.png_compress_level = png_compress_level
+        self.preview_dpi = preview_dpi
+        # Pay the JIT compile here rather than inside the first export
+        _warm_normalize_kernel()
+        # Study/series metadata dicts keyed by their UIDs; extraction
+        # walks the series tree and pydicom's slow Dataset.__getattr__,
+        # and PNG + PDF exports of the same study repeat it verbatim
+        self._meta_cache: Dict[Any, Dict[str, Any]] = {}
+        # Decoded pixel arrays keyed by dataset identity; pydicom
+        # re-decodes pixel_array on every access, which dominates for
+        # compressed transfer syntaxes when a study is exported to both
+        # PNG and PDF. Datasets are unhashable, so the key is id() with
+        # a finalizer evicting the entry when the dataset is collected.
+        self._pixel_cache: Dict[int, np.ndarray] = {}
+
+        global _pillow_simd_notice_shown
+        if not _PILLOW_SIMD and not _pillow_simd_notice_shown:
+            _pillow_simd_notice_shown = True
+            self.logger.info(
+                "pillow-simd not detected; image export will use the "
+                "slower stock Pillow encoders")
     
-    def export_to_png(self, study_data: Dict[str, Any], output_dir: str) -> bool:
+    def export_to_png(self, study_data: Dict[str, Any], output_dir: str,
+                      image_format: str = "png") -> bool:
         """
-        Export DICOM study to PNG files with metadata text files.
-        
+        Export DICOM study to image files with metadata text files.
+
         Args:
             study_data: Dictionary containing study information and DICOM datasets
-            output_dir: Output directory for PNG files and metadata
-            
+            output_dir: Output directory for image files and metadata
+            image_format: "png" (default) or "jpg" for thumbnail-grade
+                exports that encode much faster and smaller
+
         Returns:
             True if export successful, False otherwise
         """
@@ -47,8 +296,7 @@ class ExportManager:
             # Create study metadata file
             study_metadata = self._extract_study_metadata(study_data)
             metadata_file = output_path / "study_metadata.json"
-            with open(metadata_file, 'w') as f:
-                json.dump(study_metadata, f, indent=2, default=str)
+            _dump_json(metadata_file, study_metadata)
             
             self.logger.info(f"Created study metadata: {metadata_file}")
             
@@ -60,12 +308,52 @@ class ExportManager:
                 # Create series metadata
                 series_metadata = self._extract_series_metadata(series, series_idx)
                 series_metadata_file = series_dir / "series_metadata.json"
-                with open(series_metadata_file, 'w') as f:
-                    json.dump(series_metadata, f, indent=2, default=str)
+                _dump_json(series_metadata_file, series_metadata)
                 
-                # Export each image in the series
-                for image_idx, image_ds in enumerate(series.get('images', []), 1):
-                    self._export_image_to_png(image_ds, series_dir, image_idx)
+                # Export each image in the series; pixel bytes and
+                # metadata are extracted here so only picklable items
+                # cross into worker processes, and logging stays in the
+                # parent
+                images = series.get('images', [])
+                arrays = [self._cached_pixel_array(image_ds) for image_ds in images]
+
+                # Batch the per-frame min/max scans: when the frames
+                # share a shape and dtype, one stacked reduction replaces
+                # two full sweeps per frame in the workers
+                if arrays and all(a.shape == arrays[0].shape
+                                  and a.dtype == arrays[0].dtype
+                                  for a in arrays):
+                    stack = np.stack(arrays)
+                    los = stack.min(axis=(1, 2))
+                    his = stack.max(axis=(1, 2))
+                else:
+                    los = his = [None] * len(arrays)
+
+                items = [self._png_work_item(image_ds, pixel_array, series_dir,
+                                             image_idx, image_format, lo, hi)
+                         for image_idx, (image_ds, pixel_array, lo, hi)
+                         in enumerate(zip(images, arrays, los, his), 1)]
+
+                cpus = os.cpu_count() or 1
+                if len(items) >= self.PARALLEL_EXPORT_THRESHOLD and cpus > 1:
+                    with ProcessPoolExecutor(max_workers=min(cpus, len(items))) as executor:
+                        results = list(executor.map(_export_image_worker, items, chunksize=4))
+                else:
+                    results = [_export_image_worker(item) for item in items]
+
+                # One summary line per series; per-image lines only at
+                # DEBUG, so a long series doesn't spend more time on
+                # stderr I/O than on encoding
+                per_image = self.logger.logger.isEnabledFor(logging.DEBUG)
+                exported = 0
+                for image_number, png_path, error in results:
+                    if error is not None:
+                        self.logger.error(f"Error exporting image {image_number}: {error}")
+                    else:
+                        exported += 1
+                        if per_image:
+                            self.logger.debug(f"Exported image {image_number} to {png_path}")
+                self.logger.info(f"Exported {exported} images to {series_dir}")
             
             self.logger.success(f"Successfully exported study to {output_dir}")
             return True
@@ -122,49 +410,46 @@ class ExportManager:
                 story.append(Paragraph(f"<b>{key}:</b> {value}", normal_style))
             story.append(Spacer(1, 20))
             
-            # Keep track of all temporary files for cleanup
-            temp_files = []
-            
-            # Add series information
-            for series_idx, series in enumerate(study_data.get('series', []), 1):
-                story.append(Paragraph(f"Series {series_idx}", heading_style))
-                
-                # Series metadata
-                series_metadata = self._extract_series_metadata(series, series_idx)
-                for key, value in series_metadata.items():
-                    story.append(Paragraph(f"<b>{key}:</b> {value}", normal_style))
-                
-                story.append(Spacer(1, 10))
-                
-                # Add images from this series (limit to first 4 images to avoid huge PDFs)
-                images_to_show = series.get('images', [])[:4]
-                for image_idx, image_ds in enumerate(images_to_show, 1):
-                    # Create temporary PNG for this image
-                    temp_png = self._create_temp_png(image_ds)
-                    if temp_png:
-                        temp_files.append(temp_png)  # Add to list for cleanup later
-                        # Add image to PDF
-                        img = RLImage(temp_png, width=4*inch, height=4*inch)
-                        story.append(Paragraph(f"Image {image_idx} (Instance {image_ds.get('InstanceNumber', 'N/A')})", normal_style))
-                        story.append(img)
-                        story.append(Spacer(1, 10))
-                
-                if len(series.get('images', [])) > 4:
-                    story.append(Paragraph(f"... and {len(series.get('images', [])) - 4} more images", normal_style))
-                
-                story.append(PageBreak())
+            # Add series information; image encoding runs on a thread
+            # pool so it overlaps the Python-bound Paragraph building
+            # (Pillow and the JPEG codecs release the GIL while encoding)
+            with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+                for series_idx, series in enumerate(study_data.get('series', []), 1):
+                    # Kick off encoding for this series' images first
+                    # (limit to first 4 images to avoid huge PDFs)
+                    images = series.get('images', [])
+                    images_to_show = images[:4]
+                    image_futures = [pool.submit(self._create_image_buffer, image_ds)
+                                     for image_ds in images_to_show]
+
+                    story.append(Paragraph(f"Series {series_idx}", heading_style))
+
+                    # Series metadata
+                    series_metadata = self._extract_series_metadata(series, series_idx)
+                    for key, value in series_metadata.items():
+                        story.append(Paragraph(f"<b>{key}:</b> {value}", normal_style))
+
+                    story.append(Spacer(1, 10))
+
+                    for image_idx, (image_ds, future) in enumerate(
+                            zip(images_to_show, image_futures), 1):
+                        buf = future.result()
+                        if buf:
+                            # Add image to PDF
+                            img = RLImage(buf, width=4*inch, height=4*inch)
+                            story.append(Paragraph(f"Image {image_idx} (Instance {image_ds.get('InstanceNumber', 'N/A')})", normal_style))
+                            story.append(img)
+                            story.append(Spacer(1, 10))
+
+                    extra = len(images) - 4
+                    if extra > 0:
+                        story.append(Paragraph(f"... and {extra} more images", normal_style))
+
+                    story.append(PageBreak())
             
             # Build PDF
             doc.build(story)
-            
-            # Clean up temporary files
-            for temp_file in temp_files:
-                try:
-                    if os.path.exists(temp_file):
-                        os.unlink(temp_file)
-                except Exception as e:
-                    self.logger.warning(f"Could not clean up temp file {temp_file}: {e}")
-            
+
             self.logger.success(f"Successfully exported study to PDF: {output_file}")
             return True
             
@@ -172,19 +457,45 @@ class ExportManager:
             self.logger.error(f"Error exporting to PDF: {e}")
             return False
     
+    @staticmethod
+    def _collect_first_image_tags(first_image: Optional[Dataset],
+                                  names: tuple) -> Dict[str, str]:
+        """Pull the named tags off a dataset in one getattr pass.
+
+        Each hasattr-then-access pair costs two tag-dict probes on a
+        pydicom Dataset; a single getattr with a default halves that.
+        Absent tags are simply omitted from the result.
+        """
+        if first_image is None:
+            return {}
+        tags = {}
+        for name in names:
+            value = getattr(first_image, name, None)
+            if value is not None:
+                tags[name] = str(value)
+        return tags
+
+    def clear_cache(self) -> None:
+        """Drop memoized metadata, e.g. after mutating a study in place."""
+        self._meta_cache.clear()
+
     def _extract_study_metadata(self, study_data: Dict[str, Any]) -> Dict[str, Any]:
         """Extract study-level metadata."""
+        cache_key = study_data.get('study_uid')
+        if cache_key is not None and cache_key in self._meta_cache:
+            return self._meta_cache[cache_key]
+
+        series_list = study_data.get('series', [])
+
         # Get metadata from first image if available
-        study_time = 'N/A'
-        accession_number = 'N/A'
-        
-        if study_data.get('series') and study_data['series'][0].get('images'):
-            first_image = study_data['series'][0]['images'][0]
-            if hasattr(first_image, 'StudyTime'):
-                study_time = str(first_image.StudyTime)
-            if hasattr(first_image, 'AccessionNumber'):
-                accession_number = str(first_image.AccessionNumber)
-        
+        first_image = None
+        if series_list and series_list[0].get('images'):
+            first_image = series_list[0]['images'][0]
+        tags = self._collect_first_image_tags(
+            first_image, ('StudyTime', 'AccessionNumber'))
+        study_time = tags.get('StudyTime', 'N/A')
+        accession_number = tags.get('AccessionNumber', 'N/A')
+
         metadata = {
             "Study Instance UID": study_data.get('study_uid', 'N/A'),
             "Patient Name": study_data.get('patient_name', 'N/A'),
@@ -192,13 +503,19 @@ class ExportManager:
             "Study Date": study_data.get('study_date', 'N/A'),
             "Study Time": study_time,
             "Accession Number": accession_number,
-            "Number of Series": len(study_data.get('series', [])),
-            "Total Images": sum(len(series.get('images', [])) for series in study_data.get('series', []))
+            "Number of Series": len(series_list),
+            "Total Images": sum(len(series.get('images', [])) for series in series_list)
         }
+        if cache_key is not None:
+            self._meta_cache[cache_key] = metadata
         return metadata
     
     def _extract_series_metadata(self, series: Dict[str, Any], series_number: int) -> Dict[str, Any]:
         """Extract series-level metadata."""
+        cache_key = (series.get('series_uid'), series_number)
+        if cache_key[0] is not None and cache_key in self._meta_cache:
+            return self._meta_cache[cache_key]
+
         metadata = {
             "Series Number": series_number,
             "Series Instance UID": series.get('series_uid', 'N/A'),
@@ -207,90 +524,81 @@ class ExportManager:
         }
         
         # Get additional metadata from first image if available
-        if series.get('images'):
-            first_image = series['images'][0]
-            if hasattr(first_image, 'SeriesInstanceUID'):
-                metadata["Series Instance UID"] = str(first_image.SeriesInstanceUID)
-            if hasattr(first_image, 'Modality'):
-                metadata["Modality"] = str(first_image.Modality)
-            if hasattr(first_image, 'SeriesDescription'):
-                metadata["Series Description"] = str(first_image.SeriesDescription)
-            if hasattr(first_image, 'StudyDescription'):
-                metadata["Study Description"] = str(first_image.StudyDescription)
-        
+        first_image = series['images'][0] if series.get('images') else None
+        tags = self._collect_first_image_tags(
+            first_image, ('SeriesInstanceUID', 'Modality',
+                          'SeriesDescription', 'StudyDescription'))
+        for keyword, label in (('SeriesInstanceUID', "Series Instance UID"),
+                               ('Modality', "Modality"),
+                               ('SeriesDescription', "Series Description"),
+                               ('StudyDescription', "Study Description")):
+            if keyword in tags:
+                metadata[label] = tags[keyword]
+
+        if cache_key[0] is not None:
+            self._meta_cache[cache_key] = metadata
         return metadata
     
-    def _export_image_to_png(self, image_ds: Dataset, output_dir: Path, image_number: int) -> None:
-        """Export a single DICOM image to PNG format."""
-        try:
-            # Extract pixel data
+    def _cached_pixel_array(self, image_ds: Dataset) -> np.ndarray:
+        """Return image_ds.pixel_array, decoding at most once per dataset."""
+        key = id(image_ds)
+        pixel_array = self._pixel_cache.get(key)
+        if pixel_array is None:
             pixel_array = image_ds.pixel_array
-            
-            # Normalize pixel values to 0-255 range
-            if pixel_array.dtype != np.uint8:
-                # Normalize to 0-255 range
-                pixel_array = ((pixel_array - pixel_array.min()) / 
-                             (pixel_array.max() - pixel_array.min()) * 255).astype(np.uint8)
-            
-            # Create PIL Image
-            pil_image = Image.fromarray(pixel_array, mode='L')
-            
-            # Save PNG
-            png_filename = f"image_{image_number:03d}_instance_{image_ds.get('InstanceNumber', image_number)}.png"
-            png_path = output_dir / png_filename
-            pil_image.save(png_path)
-            
-            # Create metadata text file for this image
-            metadata_filename = f"image_{image_number:03d}_metadata.txt"
-            metadata_path = output_dir / metadata_filename
-            
-            with open(metadata_path, 'w') as f:
-                f.write(f"DICOM Image Metadata\n")
-                f.write(f"====================\n\n")
-                f.write(f"Instance Number: {image_ds.get('InstanceNumber', 'N/A')}\n")
-                f.write(f"SOP Instance UID: {image_ds.get('SOPInstanceUID', 'N/A')}\n")
-                f.write(f"Modality: {image_ds.get('Modality', 'N/A')}\n")
-                f.write(f"Rows: {image_ds.get('Rows', 'N/A')}\n")
-                f.write(f"Columns: {image_ds.get('Columns', 'N/A')}\n")
-                f.write(f"Bits Allocated: {image_ds.get('BitsAllocated', 'N/A')}\n")
-                f.write(f"Bits Stored: {image_ds.get('BitsStored', 'N/A')}\n")
-                f.write(f"Photometric Interpretation: {image_ds.get('PhotometricInterpretation', 'N/A')}\n")
-                f.write(f"Patient Name: {image_ds.get('PatientName', 'N/A')}\n")
-                f.write(f"Patient ID: {image_ds.get('PatientID', 'N/A')}\n")
-                f.write(f"Patient DOB: {image_ds.get('PatientBirthDate', 'N/A')}\n")
-                f.write(f"Study Date: {image_ds.get('StudyDate', 'N/A')}\n")
-                f.write(f"Study Time: {image_ds.get('StudyTime', 'N/A')}\n")
-                f.write(f"Accession Number: {image_ds.get('AccessionNumber', 'N/A')}\n")
-            
-            self.logger.info(f"Exported image {image_number} to {png_path}")
-            
-        except Exception as e:
-            self.logger.error(f"Error exporting image {image_number}: {e}")
-    
-    def _create_temp_png(self, image_ds: Dataset) -> Optional[str]:
-        """Create a temporary PNG file for PDF inclusion."""
+            self._pixel_cache[key] = pixel_array
+            weakref.finalize(image_ds, self._pixel_cache.pop, key, None)
+        return pixel_array
+
+    def _png_work_item(self, image_ds: Dataset, pixel_array: np.ndarray,
+                       output_dir: Path, image_number: int,
+                       image_format: str = "png",
+                       lo: Optional[float] = None,
+                       hi: Optional[float] = None) -> tuple:
+        """Extract one image's export inputs as a picklable work item."""
+        metadata = [(label, str(image_ds.get(key, 'N/A')))
+                    for label, key in _IMAGE_METADATA_FIELDS]
+        return (pixel_array.tobytes(), pixel_array.shape, pixel_array.dtype.str,
+                metadata, str(output_dir), image_number,
+                image_ds.get('InstanceNumber', image_number),
+                self.png_compress_level, image_format,
+                None if lo is None else float(lo),
+                None if hi is None else float(hi),
+                image_ds.get('BitsStored'))
+
+
+    def _create_image_buffer(self, image_ds: Dataset) -> Optional[BytesIO]:
+        """Encode an image into an in-memory buffer for PDF inclusion.
+
+        ReportLab accepts file-like objects, so the frame never touches
+        the filesystem: no temp file creation and no unlink pass after
+        the build. JPEG because ReportLab re-encodes it anyway and the
+        buffer lives only until the document is built.
+        """
         try:
-            # Extract pixel data
-            pixel_array = image_ds.pixel_array
-            
-            # Normalize pixel values to 0-255 range
-            if pixel_array.dtype != np.uint8:
-                pixel_array = ((pixel_array - pixel_array.min()) / 
-                             (pixel_array.max() - pixel_array.min()) * 255).astype(np.uint8)
-            
-            # Create PIL Image
-            pil_image = Image.fromarray(pixel_array, mode='L')
-            
-            # Create temporary file
-            import tempfile
-            temp_fd, temp_path = tempfile.mkstemp(suffix='.png')
-            os.close(temp_fd)
-            
-            # Save PNG
-            pil_image.save(temp_path)
-            
-            return temp_path
-            
+            # Extract pixel data and normalize to 0-255 range
+            pixel_array = _normalize_to_uint8(
+                self._cached_pixel_array(image_ds),
+                bits_stored=image_ds.get('BitsStored'))
+
+            # The PDF renders these at 4x4 inches, so anything beyond
+            # 4 * preview_dpi pixels is encoded and shipped only to be
+            # thrown away by the rasterizer
+            target_px = 4 * self.preview_dpi
+            if max(pixel_array.shape) > target_px:
+                pil_image = _image_from_uint8(pixel_array)
+                pil_image.thumbnail((target_px, target_px), Image.LANCZOS)
+                pixel_array = np.asarray(pil_image)
+
+            if imagecodecs is not None:
+                # Encode straight from the ndarray, no PIL object at all
+                return BytesIO(imagecodecs.jpeg_encode(pixel_array, level=85))
+
+            buf = BytesIO()
+            _image_from_uint8(pixel_array).save(
+                buf, format='JPEG', quality=85, optimize=False)
+            buf.seek(0)
+            return buf
+
         except Exception as e:
-            self.logger.error(f"Error creating temporary PNG: {e}")
+            self.logger.error(f"Error encoding image for PDF: {e}")
             return None
@@ -7,53 +7,371 @@ Licensed under the MIT License
 
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
-from typing import Tuple, Optional, Dict, Any
-import random
+from typing import Tuple, Optional, Dict, Any, List
 import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Optional: OpenCV's add/subtract saturate uint16 natively (paddusw and
+# friends), so intensity accumulation skips the int32 expand/clip/cast
+# round trip and moves half the bytes
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+# Optional: JIT-compiled disk drawing, same pattern as the export
+# manager's normalization kernel. The compiled loop tests and saturates
+# each pixel in registers, with no mask array or int32 scratch at all.
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _add_disk_njit(img, cx, cy, r, intensity):
+        # Scanline fill: one sqrt per row finds the chord, so the inner
+        # loop touches exactly the in-circle pixels with no per-pixel
+        # membership test (~21% fewer visits than scanning the bbox)
+        h, w = img.shape
+        r2 = r * r
+        for iy in numba.prange(max(0, cy - r), min(h, cy + r + 1)):
+            dy = iy - cy
+            rem = r2 - dy * dy
+            # Exact floor sqrt: correct the float estimate both ways
+            dx = int(math.sqrt(rem))
+            if (dx + 1) * (dx + 1) <= rem:
+                dx += 1
+            elif dx * dx > rem:
+                dx -= 1
+            for ix in range(max(0, cx - dx), min(w, cx + dx + 1)):
+                v = int(img[iy, ix]) + intensity
+                img[iy, ix] = 0 if v < 0 else (65535 if v > 65535 else v)
+
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _add_ring_njit(img, cx, cy, r_outer, r_inner, ring_add, inner_add):
+        # One scan writes the annulus and the interior together: per row
+        # the outer and inner chords split into left-ring / interior /
+        # right-ring runs, so each pixel sees a single read-modify-write
+        # instead of two masked passes over the full disk
+        h, w = img.shape
+        ro2 = r_outer * r_outer
+        ri2 = r_inner * r_inner
+        for iy in numba.prange(max(0, cy - r_outer), min(h, cy + r_outer + 1)):
+            dy = iy - cy
+            rem_o = ro2 - dy * dy
+            dx_o = int(math.sqrt(rem_o))
+            if (dx_o + 1) * (dx_o + 1) <= rem_o:
+                dx_o += 1
+            elif dx_o * dx_o > rem_o:
+                dx_o -= 1
+            rem_i = ri2 - dy * dy
+            if rem_i < 0:
+                # Row misses the inner disk: the whole chord is ring
+                for ix in range(max(0, cx - dx_o), min(w, cx + dx_o + 1)):
+                    v = int(img[iy, ix]) + ring_add
+                    img[iy, ix] = 0 if v < 0 else (65535 if v > 65535 else v)
+                continue
+            dx_i = int(math.sqrt(rem_i))
+            if (dx_i + 1) * (dx_i + 1) <= rem_i:
+                dx_i += 1
+            elif dx_i * dx_i > rem_i:
+                dx_i -= 1
+            for ix in range(max(0, cx - dx_o), min(w, cx - dx_i)):
+                v = int(img[iy, ix]) + ring_add
+                img[iy, ix] = 0 if v < 0 else (65535 if v > 65535 else v)
+            for ix in range(max(0, cx - dx_i), min(w, cx + dx_i + 1)):
+                v = int(img[iy, ix]) + inner_add
+                img[iy, ix] = 0 if v < 0 else (65535 if v > 65535 else v)
+            for ix in range(max(0, cx + dx_i + 1), min(w, cx + dx_o + 1)):
+                v = int(img[iy, ix]) + ring_add
+                img[iy, ix] = 0 if v < 0 else (65535 if v > 65535 else v)
+
+    @numba.njit(cache=True)
+    def _add_disks_njit(img, cxs, cys, rs, intensities):
+        # One compiled call per batch: the ufunc dispatch and bbox
+        # bookkeeping for every disk happen inside the JIT region
+        for i in range(cxs.shape[0]):
+            _add_disk_njit(img, cxs[i], cys[i], rs[i], intensities[i])
+else:
+    _add_disk_njit = None
+    _add_disks_njit = None
+    _add_ring_njit = None
+
+# Resolved once at import: probing candidate font files per call made
+# every overlay on hosts without Arial pay a thrown-and-caught OSError
+# before falling back
+_FONT_PATH = next(
+    (p for p in ("/System/Library/Fonts/Arial.ttf",
+                 "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+                 "arial.ttf")
+     if os.path.exists(p)),
+    None)
+
+_disk_kernel_warmed = False
+
+
+def _warm_disk_kernel() -> None:
+    """Trigger the numba JIT compile once, off the first real image."""
+    global _disk_kernel_warmed
+    if _add_disk_njit is not None and not _disk_kernel_warmed:
+        _disk_kernel_warmed = True
+        _add_disk_njit(np.zeros((2, 2), np.uint16), 0, 0, 1, 1)
+        ones = np.ones(1, np.int64)
+        _add_disks_njit(np.zeros((2, 2), np.uint16), ones, ones, ones, ones)
+        _add_ring_njit(np.zeros((4, 4), np.uint16), 1, 1, 2, 1, 1, 1)
 
 
 class DICOMImageGenerator:
     """Generates realistic DICOM images using dicom-fabricator style."""
-    
+
+    # Background noise parameters (mean, sigma) per anatomical region,
+    # matching the per-region generators below
+    REGION_NOISE = {
+        "chest": (1000, 50),
+        "abdomen": (800, 30),
+        "pelvis": (900, 40),
+        "head": (100, 20),
+        "spine": (1000, 50),
+        "limb": (1200, 60),
+    }
+
+    # Noise parameters for regions without a dedicated generator
+    GENERIC_NOISE = (1000, 100)
+
     def __init__(self):
         """Initialize the image generator."""
-        self.anatomical_regions = {
-            "chest": self._generate_chest_image,
-            "abdomen": self._generate_abdomen_image,
-            "pelvis": self._generate_pelvis_image,
-            "head": self._generate_head_image,
-            "spine": self._generate_spine_image,
-            "limb": self._generate_limb_image,
-        }
-    
+        # Thread-local state first: the rng property, the int32 add/clip
+        # scratch and the float32 noise tiles all live here, so worker
+        # threads in generate_batch never share mutable buffers
+        self._scratch = threading.local()
+        self.rng = np.random.default_rng()
+        # Read-shared normal(0, 1) reservoir for background noise; built
+        # lazily to the largest geometry seen, then every fill is a
+        # scaled copy of a random window instead of fresh RNG draws
+        self._noise_reservoir: Optional[np.ndarray] = None
+        self._reservoir_lock = threading.Lock()
+        # Pay the JIT compile here rather than inside the first image
+        _warm_disk_kernel()
+        # Boolean disk masks keyed by radius; radii come from a small
+        # integer range, so each squared-distance grid is computed once
+        # and reused for every structure of that size
+        self._disk_cache: Dict[int, np.ndarray] = {}
+        # Loaded fonts keyed by size; truetype() does a filesystem probe
+        # plus a full FreeType face load, repeated per image otherwise
+        self._font_cache: Dict[int, ImageFont.ImageFont] = {}
+        # Rendered text overlays keyed by their lines and geometry. The
+        # burnt-in lines carry no per-instance fields, so every frame in
+        # a series reuses one rendered patch instead of re-running the
+        # PIL draw. Bounded: cleared when it outgrows a study's worth
+        self._overlay_cache: Dict[tuple, np.ndarray] = {}
+        # 12-bit -> 16-bit rescale table for CT/MR: the input is clipped
+        # to [0, 4095], so a 4096-entry lookup replaces the float
+        # multiply pass with pure loads
+        self._ct_lut = (np.arange(4096, dtype=np.uint32) * 65535 // 4095).astype(np.uint16)
+
+    @property
+    def rng(self) -> np.random.Generator:
+        """Thread-local random Generator.
+
+        numpy Generators are not thread-safe, so each thread that calls
+        into the generator gets its own PCG64 stream, created lazily.
+        """
+        rng = getattr(self._scratch, "rng", None)
+        if rng is None:
+            rng = np.random.default_rng()
+            self._scratch.rng = rng
+        return rng
+
+    @rng.setter
+    def rng(self, value: np.random.Generator):
+        self._scratch.rng = value
+
     def _add_intensity(self, image: np.ndarray, intensity) -> np.ndarray:
         """Safely add intensity to image with proper dtype handling."""
-        if isinstance(intensity, (int, float)):
-            image = image.astype(np.int32) + intensity
-        else:
-            image = image.astype(np.int32) + intensity.astype(np.int32)
-        return np.clip(image, 0, 65535).astype(np.uint16)
+        if cv2 is not None and np.isscalar(intensity):
+            # Hardware saturating add/subtract, no int32 temporary
+            if intensity >= 0:
+                return cv2.add(image, (intensity, 0, 0, 0))
+            return cv2.subtract(image, (-intensity, 0, 0, 0))
+        tmp = self._i32_scratch(image.shape)
+        # dtype= forces the int32 ufunc loop; without it NumPy picks the
+        # uint16 loop from the inputs and wraps before the cast to out
+        np.add(image, intensity, out=tmp, dtype=np.int32, casting='unsafe')
+        np.clip(tmp, 0, 65535, out=tmp)
+        return tmp.astype(np.uint16)
+
+    def _i32_scratch(self, shape: tuple) -> np.ndarray:
+        """Return a reusable int32 scratch view of the given 2-D shape."""
+        n = shape[0] * shape[1]
+        buf = getattr(self._scratch, "i32", None)
+        if buf is None or buf.size < n:
+            buf = np.empty(n, np.int32)
+            self._scratch.i32 = buf
+        return buf[:n].reshape(shape)
+
+    def _f32_tile(self, shape: tuple) -> np.ndarray:
+        """Return this thread's reusable float32 noise tile for shape."""
+        tiles = getattr(self._scratch, "tiles", None)
+        if tiles is None:
+            tiles = self._scratch.tiles = {}
+        tile = tiles.get(shape)
+        if tile is None:
+            # float32 halves the bandwidth of the scale/shift/clip chain
+            # relative to the default float64 draw, with sigma far above
+            # its precision loss
+            tile = tiles[shape] = np.empty(shape, dtype=np.float32)
+        return tile
+
+    def _u16_frame(self, shape: tuple) -> np.ndarray:
+        """Return this thread's reusable uint16 working frame for shape.
+
+        The _generate_* methods draw onto this frame instead of a fresh
+        allocation per image; _apply_modality_characteristics hands the
+        caller a copy, so the frame itself never escapes.
+        """
+        frames = getattr(self._scratch, "frames", None)
+        if frames is None:
+            frames = self._scratch.frames = {}
+        frame = frames.get(shape)
+        if frame is None:
+            frame = frames[shape] = np.empty(shape, dtype=np.uint16)
+        return frame
+
+    # Fixed seed so the reservoir contents (and therefore seeded images)
+    # are reproducible across runs; per-image variation comes from the
+    # window offsets drawn from self.rng
+    _RESERVOIR_SEED = 0x1C0
+
+    def _noise_view(self, height: int, width: int) -> np.ndarray:
+        """Return a random normal(0, 1) window from the shared reservoir.
+
+        Sampling 512x512 Gaussian noise costs ~260k RNG draws per image,
+        which dominates generation at study scale. The reservoir is drawn
+        once at twice the largest frame size seen, and each image reads a
+        randomly offset window, turning the fill into a scaled copy. The
+        reservoir is only ever read after creation, so generate_batch
+        workers share it freely.
+        """
+        res = self._noise_reservoir
+        if res is None or res.shape[0] < 2 * height or res.shape[1] < 2 * width:
+            with self._reservoir_lock:
+                res = self._noise_reservoir
+                if res is None or res.shape[0] < 2 * height or res.shape[1] < 2 * width:
+                    shape = (max(2 * height, 1024), max(2 * width, 1024))
+                    res = np.random.default_rng(self._RESERVOIR_SEED).standard_normal(
+                        shape, dtype=np.float32)
+                    self._noise_reservoir = res
+        oy = int(self.rng.integers(0, res.shape[0] - height + 1))
+        ox = int(self.rng.integers(0, res.shape[1] - width + 1))
+        return res[oy:oy + height, ox:ox + width]
+
+    def _fill_noise_background(self, image: np.ndarray, mean: float, sigma: float):
+        """Fill an image with clipped Gaussian background noise in place.
+
+        The old `image += normal(...).astype(uint16)` pattern wrapped
+        negative draws around to values near 65535, salting the
+        background with bright pixels; clipping before the cast keeps
+        the distribution intact and writes the final uint16 in one pass.
+        """
+        noise = self._f32_tile(image.shape)
+        np.multiply(self._noise_view(*image.shape), sigma, out=noise)
+        noise += mean
+        np.clip(noise, 0, 65535, out=noise)
+        np.copyto(image, noise, casting='unsafe')
     
-    def generate_image(self, width: int = 512, height: int = 512, 
+    def batch_noise(self, count: int, width: int = 512, height: int = 512,
+                    anatomical_region: str = "chest",
+                    out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Draw background noise for a batch of images in a single PRNG call.
+
+        The noise is cosmetic background texture, so one tile is drawn and
+        broadcast to every frame instead of sampling count*height*width
+        values; a per-frame XOR of the frame index keeps frames from being
+        bit-identical. This collapses the PRNG cost of a whole study to a
+        single frame's worth. Slices of the result are passed to
+        generate_image as the `base` background.
+
+        Args:
+            count: Number of images in the batch
+            width: Image width in pixels
+            height: Image height in pixels
+            anatomical_region: Region whose noise parameters to use
+            out: Optional preallocated (count, height, width) uint16 array
+                to fill in place (e.g. a view over a shared byte pool)
+
+        Returns:
+            (count, height, width) uint16 array of background noise
+        """
+        mean, sigma = self.REGION_NOISE.get(anatomical_region, self.GENERIC_NOISE)
+        # Scale a reservoir window into a reusable scratch tile; the
+        # shift/clip then run in place, so steady state allocates nothing
+        tile = self._f32_tile((height, width))
+        np.multiply(self._noise_view(height, width), sigma, out=tile)
+        tile += mean
+        np.clip(tile, 0, 65535, out=tile)
+        if out is None:
+            out = np.empty((count, height, width), dtype=np.uint16)
+        np.copyto(out, tile, casting='unsafe')
+        # Cheap per-frame variation: flip the low bits by frame index so
+        # no two frames are byte-identical
+        out ^= np.arange(count, dtype=np.uint16)[:, None, None]
+        return out
+
+    def generate_batch(self, specs: List[Dict[str, Any]],
+                       max_workers: Optional[int] = None) -> List[np.ndarray]:
+        """
+        Generate several images concurrently on a thread pool.
+
+        Each entry of `specs` is a dict of generate_image keyword
+        arguments. Per-thread RNG streams and scratch buffers mean the
+        workers share nothing mutable; results come back in spec order.
+
+        Args:
+            specs: List of keyword-argument dicts for generate_image
+            max_workers: Thread count; defaults to the CPU count capped
+                at the batch size
+
+        Returns:
+            List of generated images, one per spec, in order
+        """
+        if len(specs) <= 1:
+            return [self.generate_image(**spec) for spec in specs]
+        if max_workers is None:
+            max_workers = min(os.cpu_count() or 1, len(specs))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(lambda spec: self.generate_image(**spec), specs))
+
+    def generate_image(self, width: int = 512, height: int = 512,
                       modality: str = "CR", anatomical_region: str = "chest",
                       dicom_metadata: Optional[Dict[str, Any]] = None,
+                      seed: Optional[int] = None,
                       **kwargs) -> np.ndarray:
         """
         Generate a realistic DICOM image with burnt-in text.
-        
+
         Args:
             width: Image width in pixels
             height: Image height in pixels
             modality: DICOM modality (CR, CT, MR, US, etc.)
             anatomical_region: Anatomical region to simulate
             dicom_metadata: DICOM metadata for burnt-in text
-            **kwargs: Additional parameters for image generation
-            
+            seed: Optional seed to reseed the generator's RNG for a
+                deterministic, reproducible image
+            **kwargs: Additional parameters for image generation; `base`
+                supplies pre-drawn background noise (see batch_noise)
+
         Returns:
             Generated image as numpy array
         """
-        if anatomical_region in self.anatomical_regions:
-            image = self.anatomical_regions[anatomical_region](width, height, modality, **kwargs)
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        generator = self._REGION_GENERATORS.get(anatomical_region)
+        if generator is not None:
+            image = generator(self, width, height, modality, **kwargs)
         else:
             image = self._generate_generic_image(width, height, modality, **kwargs)
         
@@ -65,22 +383,25 @@ class DICOMImageGenerator:
     
     def _generate_chest_image(self, width: int, height: int, modality: str, **kwargs) -> np.ndarray:
         """Generate a chest X-ray like image."""
-        image = np.zeros((height, width), dtype=np.uint16)
-        
-        # Add background noise
-        noise = np.random.normal(1000, 50, (height, width)).astype(np.uint16)
-        image = self._add_intensity(image, noise)
-        
-        # Add rib structures
-        for i in range(5):
-            y = height // 6 + i * height // 6
-            self._add_rib_structure(image, y, width, height)
-        
-        # Add heart shadow
-        heart_center_x = width // 2 + random.randint(-20, 20)
-        heart_center_y = height // 2 + random.randint(-10, 10)
-        heart_radius = random.randint(30, 50)
-        self._add_heart_shadow(image, heart_center_x, heart_center_y, heart_radius)
+        image = kwargs.pop("base", None)
+        if image is None:
+            image = self._u16_frame((height, width))
+            self._fill_noise_background(image, 1000, 50)
+        
+        # Add rib structures: all five rows' disks in one batch, so the
+        # radii and intensities come from two RNG calls instead of ten
+        rib_cxs = np.tile(np.arange(1, 4) * (width // 4), 5)
+        rib_cys = np.repeat(np.arange(1, 6) * (height // 6), 3)
+        self._add_disks_batch(image, rib_cxs, rib_cys,
+                              self.rng.integers(15, 26, 15),
+                              self.rng.integers(50, 101, 15))
+
+        # Add heart shadow; broadcast low/high bounds draw all four
+        # parameters in one RNG call
+        dx, dy, heart_radius, heart_intensity = self.rng.integers(
+            [-20, -10, 30, 80], [21, 11, 51, 121])
+        self._add_heart_shadow(image, width // 2 + int(dx), height // 2 + int(dy),
+                               int(heart_radius), int(heart_intensity))
         
         # Add lung fields
         self._add_lung_fields(image, width, height)
@@ -92,15 +413,16 @@ class DICOMImageGenerator:
     
     def _generate_abdomen_image(self, width: int, height: int, modality: str, **kwargs) -> np.ndarray:
         """Generate an abdominal image."""
-        image = np.zeros((height, width), dtype=np.uint16)
-        
-        # Add background
-        image += np.random.normal(800, 30, (height, width)).astype(np.uint16)
+        image = kwargs.pop("base", None)
+        if image is None:
+            image = self._u16_frame((height, width))
+            self._fill_noise_background(image, 800, 30)
         
         # Add spine
         spine_x = width // 2
-        spine_width = random.randint(15, 25)
-        image[:, spine_x-spine_width//2:spine_x+spine_width//2] += 200
+        spine_width = int(self.rng.integers(15, 26))
+        strip = image[:, spine_x-spine_width//2:spine_x+spine_width//2]
+        strip[:] = self._add_intensity(strip, 200)
         
         # Add soft tissue structures
         for i in range(3):
@@ -114,10 +436,10 @@ class DICOMImageGenerator:
     
     def _generate_pelvis_image(self, width: int, height: int, modality: str, **kwargs) -> np.ndarray:
         """Generate a pelvic image."""
-        image = np.zeros((height, width), dtype=np.uint16)
-        
-        # Add background
-        image += np.random.normal(900, 40, (height, width)).astype(np.uint16)
+        image = kwargs.pop("base", None)
+        if image is None:
+            image = self._u16_frame((height, width))
+            self._fill_noise_background(image, 900, 40)
         
         # Add pelvic bones
         self._add_pelvic_bones(image, width, height)
@@ -129,10 +451,10 @@ class DICOMImageGenerator:
     
     def _generate_head_image(self, width: int, height: int, modality: str, **kwargs) -> np.ndarray:
         """Generate a head/CT image."""
-        image = np.zeros((height, width), dtype=np.uint16)
-        
-        # Add background
-        image += np.random.normal(100, 20, (height, width)).astype(np.uint16)
+        image = kwargs.pop("base", None)
+        if image is None:
+            image = self._u16_frame((height, width))
+            self._fill_noise_background(image, 100, 20)
         
         # Add skull
         center_x, center_y = width // 2, height // 2
@@ -146,10 +468,10 @@ class DICOMImageGenerator:
     
     def _generate_spine_image(self, width: int, height: int, modality: str, **kwargs) -> np.ndarray:
         """Generate a spine image."""
-        image = np.zeros((height, width), dtype=np.uint16)
-        
-        # Add background
-        image += np.random.normal(1000, 50, (height, width)).astype(np.uint16)
+        image = kwargs.pop("base", None)
+        if image is None:
+            image = self._u16_frame((height, width))
+            self._fill_noise_background(image, 1000, 50)
         
         # Add vertebral column
         spine_x = width // 2
@@ -164,15 +486,16 @@ class DICOMImageGenerator:
     
     def _generate_limb_image(self, width: int, height: int, modality: str, **kwargs) -> np.ndarray:
         """Generate a limb image."""
-        image = np.zeros((height, width), dtype=np.uint16)
-        
-        # Add background
-        image += np.random.normal(1200, 60, (height, width)).astype(np.uint16)
+        image = kwargs.pop("base", None)
+        if image is None:
+            image = self._u16_frame((height, width))
+            self._fill_noise_background(image, 1200, 60)
         
         # Add bone structure
         bone_center_x = width // 2
-        bone_width = random.randint(20, 40)
-        image[:, bone_center_x-bone_width//2:bone_center_x+bone_width//2] += 300
+        bone_width = int(self.rng.integers(20, 41))
+        strip = image[:, bone_center_x-bone_width//2:bone_center_x+bone_width//2]
+        strip[:] = self._add_intensity(strip, 300)
         
         # Add soft tissue
         self._add_limb_soft_tissue(image, width, height)
@@ -181,37 +504,55 @@ class DICOMImageGenerator:
     
     def _generate_generic_image(self, width: int, height: int, modality: str, **kwargs) -> np.ndarray:
         """Generate a generic medical image."""
-        image = np.zeros((height, width), dtype=np.uint16)
-        
-        # Add background noise
-        image += np.random.normal(1000, 100, (height, width)).astype(np.uint16)
+        image = kwargs.pop("base", None)
+        if image is None:
+            image = self._u16_frame((height, width))
+            self._fill_noise_background(image, 1000, 100)
         
         # Add some random structures
-        for _ in range(random.randint(3, 8)):
-            x = random.randint(0, width)
-            y = random.randint(0, height)
-            radius = random.randint(10, 30)
-            intensity = random.randint(100, 300)
-            self._add_circular_structure(image, x, y, radius, intensity)
+        n = int(self.rng.integers(3, 9))
+        self._add_disks_batch(image,
+                              self.rng.integers(0, width + 1, n),
+                              self.rng.integers(0, height + 1, n),
+                              self.rng.integers(10, 31, n),
+                              self.rng.integers(100, 301, n))
         
         return self._apply_modality_characteristics(image, modality)
-    
-    def _add_rib_structure(self, image: np.ndarray, y: int, width: int, height: int):
-        """Add rib-like structures to the image."""
-        for i in range(3):
-            x = width // 4 + i * width // 4
-            radius = random.randint(15, 25)
-            intensity = random.randint(50, 100)
-            self._add_circular_structure(image, x, y, radius, intensity)
-    
-    def _add_heart_shadow(self, image: np.ndarray, center_x: int, center_y: int, radius: int):
+
+    # Region dispatch table, built once at class creation from the plain
+    # function objects -- no per-instance dict of bound methods
+    _REGION_GENERATORS = {
+        "chest": _generate_chest_image,
+        "abdomen": _generate_abdomen_image,
+        "pelvis": _generate_pelvis_image,
+        "head": _generate_head_image,
+        "spine": _generate_spine_image,
+        "limb": _generate_limb_image,
+    }
+
+    def _add_disks_batch(self, image: np.ndarray, cxs, cys, rs, intensities):
+        """Draw a batch of disks, grouped by radius.
+
+        The parameter arrays are drawn in one RNG call each by the
+        callers. With numba the whole batch runs in one compiled call;
+        otherwise sorting by radius keeps each cached disk mask hot for
+        its whole group instead of thrashing the cache.
+        """
+        if _add_disks_njit is not None:
+            _add_disks_njit(image,
+                            np.asarray(cxs, dtype=np.int64),
+                            np.asarray(cys, dtype=np.int64),
+                            np.asarray(rs, dtype=np.int64),
+                            np.asarray(intensities, dtype=np.int64))
+            return
+        for i in np.argsort(rs, kind='stable'):
+            self._add_circular_structure(image, int(cxs[i]), int(cys[i]),
+                                         int(rs[i]), int(intensities[i]))
+
+    def _add_heart_shadow(self, image: np.ndarray, center_x: int, center_y: int,
+                          radius: int, intensity: int):
         """Add heart shadow to the image."""
-        y, x = np.ogrid[:image.shape[0], :image.shape[1]]
-        mask = (x - center_x)**2 + (y - center_y)**2 <= radius**2
-        intensity = random.randint(80, 120)
-        temp_image = image.astype(np.int32)
-        temp_image[mask] += intensity
-        image[:] = np.clip(temp_image, 0, 65535).astype(np.uint16)
+        self._add_circular_structure(image, center_x, center_y, radius, intensity)
     
     def _add_lung_fields(self, image: np.ndarray, width: int, height: int):
         """Add lung field structures."""
@@ -231,26 +572,28 @@ class DICOMImageGenerator:
         """Add clavicle structures."""
         clavicle_y = height // 8
         # Left clavicle
-        for x in range(width // 4, 3 * width // 4):
-            if random.random() < 0.3:
-                image[clavicle_y:clavicle_y+3, x] += 100
+        cols = np.arange(width // 4, 3 * width // 4)
+        cols = cols[self.rng.random(cols.size) < 0.3]
+        band = image[clavicle_y:clavicle_y+3, cols]
+        image[clavicle_y:clavicle_y+3, cols] = self._add_intensity(band, 100)
     
     def _add_soft_tissue_structure(self, image: np.ndarray, y: int, width: int, height: int):
         """Add soft tissue structures."""
-        for x in range(0, width, 20):
-            if random.random() < 0.4:
-                radius = random.randint(5, 15)
-                intensity = random.randint(30, 80)
-                self._add_circular_structure(image, x, y, radius, intensity)
+        cxs = np.arange(0, width, 20)
+        cxs = cxs[self.rng.random(cxs.size) < 0.4]
+        n = cxs.size
+        self._add_disks_batch(image, cxs, np.full(n, y),
+                              self.rng.integers(5, 16, n),
+                              self.rng.integers(30, 81, n))
     
     def _add_bowel_gas(self, image: np.ndarray, width: int, height: int):
         """Add bowel gas patterns."""
-        for _ in range(random.randint(5, 15)):
-            x = random.randint(0, width)
-            y = random.randint(height // 4, 3 * height // 4)
-            radius = random.randint(8, 20)
-            intensity = -random.randint(50, 100)
-            self._add_circular_structure(image, x, y, radius, intensity)
+        n = int(self.rng.integers(5, 16))
+        self._add_disks_batch(image,
+                              self.rng.integers(0, width + 1, n),
+                              self.rng.integers(height // 4, 3 * height // 4 + 1, n),
+                              self.rng.integers(8, 21, n),
+                              -self.rng.integers(50, 101, n))
     
     def _add_pelvic_bones(self, image: np.ndarray, width: int, height: int):
         """Add pelvic bone structures."""
@@ -271,23 +614,29 @@ class DICOMImageGenerator:
     
     def _add_pelvic_soft_tissue(self, image: np.ndarray, width: int, height: int):
         """Add pelvic soft tissue."""
-        for _ in range(random.randint(8, 20)):
-            x = random.randint(0, width)
-            y = random.randint(height // 4, 3 * height // 4)
-            radius = random.randint(10, 25)
-            intensity = random.randint(20, 60)
-            self._add_circular_structure(image, x, y, radius, intensity)
+        n = int(self.rng.integers(8, 21))
+        self._add_disks_batch(image,
+                              self.rng.integers(0, width + 1, n),
+                              self.rng.integers(height // 4, 3 * height // 4 + 1, n),
+                              self.rng.integers(10, 26, n),
+                              self.rng.integers(20, 61, n))
     
     def _add_skull(self, image: np.ndarray, center_x: int, center_y: int, radius: int):
-        """Add skull structure."""
-        y, x = np.ogrid[:image.shape[0], :image.shape[1]]
-        mask = (x - center_x)**2 + (y - center_y)**2 <= radius**2
-        image[mask] += 200
-        
+        """Add skull structure.
+
+        The vault (+200 annulus) and the cavity it encloses (net +100
+        interior) come from one fused scan when the numba kernel is
+        available, instead of drawing the outer disk and then
+        subtracting the inner one -- half the read-modify-write traffic
+        over the skull area.
+        """
+        if _add_ring_njit is not None and radius > 20:
+            _add_ring_njit(image, center_x, center_y, radius, radius - 20, 200, 100)
+            return
+        self._add_circular_structure(image, center_x, center_y, radius, 200)
+
         # Add inner skull
-        inner_radius = radius - 20
-        inner_mask = (x - center_x)**2 + (y - center_y)**2 <= inner_radius**2
-        image[inner_mask] -= 100
+        self._add_circular_structure(image, center_x, center_y, radius - 20, -100)
     
     def _add_brain_structures(self, image: np.ndarray, center_x: int, center_y: int, radius: int):
         """Add brain structures."""
@@ -295,9 +644,7 @@ class DICOMImageGenerator:
         ventricle_y = center_y
         ventricle_x = center_x
         ventricle_radius = radius // 4
-        y, x = np.ogrid[:image.shape[0], :image.shape[1]]
-        ventricle_mask = (x - ventricle_x)**2 + (y - ventricle_y)**2 <= ventricle_radius**2
-        image[ventricle_mask] -= 50
+        self._add_circular_structure(image, ventricle_x, ventricle_y, ventricle_radius, -50)
     
     def _add_vertebra(self, image: np.ndarray, center_x: int, center_y: int, width: int):
         """Add a vertebra structure."""
@@ -307,145 +654,207 @@ class DICOMImageGenerator:
     
     def _add_spinal_soft_tissue(self, image: np.ndarray, width: int, height: int):
         """Add spinal soft tissue."""
-        for _ in range(random.randint(10, 25)):
-            x = random.randint(0, width)
-            y = random.randint(0, height)
-            radius = random.randint(8, 20)
-            intensity = random.randint(30, 70)
-            self._add_circular_structure(image, x, y, radius, intensity)
+        n = int(self.rng.integers(10, 26))
+        self._add_disks_batch(image,
+                              self.rng.integers(0, width + 1, n),
+                              self.rng.integers(0, height + 1, n),
+                              self.rng.integers(8, 21, n),
+                              self.rng.integers(30, 71, n))
     
     def _add_limb_soft_tissue(self, image: np.ndarray, width: int, height: int):
         """Add limb soft tissue."""
-        for _ in range(random.randint(15, 30)):
-            x = random.randint(0, width)
-            y = random.randint(0, height)
-            radius = random.randint(5, 15)
-            intensity = random.randint(20, 50)
-            self._add_circular_structure(image, x, y, radius, intensity)
+        n = int(self.rng.integers(15, 31))
+        self._add_disks_batch(image,
+                              self.rng.integers(0, width + 1, n),
+                              self.rng.integers(0, height + 1, n),
+                              self.rng.integers(5, 16, n),
+                              self.rng.integers(20, 51, n))
     
-    def _add_circular_structure(self, image: np.ndarray, center_x: int, center_y: int, 
+    def _get_disk_mask(self, radius: int) -> np.ndarray:
+        """Return the cached (2r+1, 2r+1) boolean disk mask for a radius.
+
+        Built from a single 1-D squared-distance vector broadcast
+        against itself — 2r+1 squares instead of (2r+1)^2 — and only on
+        the first request for each radius.
+        """
+        mask = self._disk_cache.get(radius)
+        if mask is None:
+            d2 = np.arange(-radius, radius + 1, dtype=np.int32)
+            d2 *= d2
+            mask = self._disk_cache.setdefault(
+                radius, d2[:, None] + d2[None, :] <= radius * radius)
+        return mask
+
+    def _add_circular_structure(self, image: np.ndarray, center_x: int, center_y: int,
                                radius: int, intensity: int):
-        """Add a circular structure to the image."""
-        y, x = np.ogrid[:image.shape[0], :image.shape[1]]
-        mask = (x - center_x)**2 + (y - center_y)**2 <= radius**2
-        # Safely add intensity
-        temp_image = image.astype(np.int32)
-        temp_image[mask] += intensity
-        image[:] = np.clip(temp_image, 0, 65535).astype(np.uint16)
+        """Add a circular structure to the image.
+
+        Only the disk's bounding box is touched: the old version cast,
+        clipped and rewrote the full image per structure, which moved
+        hundreds of times more memory than the disk itself for every
+        one of the dozens of structures per image. The disk mask itself
+        is cached by radius, so the squared-distance grid is built once
+        per radius rather than once per structure.
+        """
+        if radius <= 0:
+            return
+        if _add_disk_njit is not None:
+            _add_disk_njit(image, center_x, center_y, radius, intensity)
+            return
+        h, w = image.shape
+        y0, y1 = max(0, center_y - radius), min(h, center_y + radius + 1)
+        x0, x1 = max(0, center_x - radius), min(w, center_x + radius + 1)
+        if y0 >= y1 or x0 >= x1:
+            return
+        mask = self._get_disk_mask(radius)
+        # Matching window into the mask when the disk is edge-clipped
+        mask = mask[y0 - (center_y - radius):y1 - (center_y - radius),
+                    x0 - (center_x - radius):x1 - (center_x - radius)]
+        if cv2 is not None:
+            # Masked hardware saturating add over the bbox copy
+            sub = np.ascontiguousarray(image[y0:y1, x0:x1])
+            cv_mask = np.ascontiguousarray(mask).view(np.uint8)
+            if intensity >= 0:
+                cv2.add(sub, (intensity, 0, 0, 0), dst=sub, mask=cv_mask)
+            else:
+                cv2.subtract(sub, (-intensity, 0, 0, 0), dst=sub, mask=cv_mask)
+            image[y0:y1, x0:x1] = sub
+            return
+        sub = self._i32_scratch((y1 - y0, x1 - x0))
+        np.copyto(sub, image[y0:y1, x0:x1], casting='unsafe')
+        np.add(sub, intensity, where=mask, out=sub)
+        np.clip(sub, 0, 65535, out=sub)
+        np.copyto(image[y0:y1, x0:x1], sub, casting='unsafe')
     
     def _apply_modality_characteristics(self, image: np.ndarray, modality: str) -> np.ndarray:
         """Apply modality-specific characteristics to the image."""
         if modality == "CT":
             # CT images typically have higher contrast and different intensity ranges
-            image = np.clip(image, 0, 4095)  # 12-bit CT
-            image = (image / 4095 * 65535).astype(np.uint16)
+            np.clip(image, 0, 4095, out=image)  # 12-bit CT
+            image = self._ct_lut[image]
         elif modality == "MR":
             # MR images have different intensity characteristics
-            image = np.clip(image, 0, 4095)
-            image = (image / 4095 * 65535).astype(np.uint16)
+            np.clip(image, 0, 4095, out=image)
+            image = self._ct_lut[image]
         elif modality == "US":
             # Ultrasound images have different characteristics
-            image = np.clip(image, 0, 255)
-            image = (image * 257).astype(np.uint16)  # Scale to 16-bit
-        else:
-            # Default for CR, DX, etc.
-            image = np.clip(image, 0, 65535)
-        
-        return image.astype(np.uint16)
+            np.clip(image, 0, 255, out=image)
+            image |= image << 8  # x | x<<8 == x * 257: scale to 16-bit
+        # Default for CR, DX, etc. needs no clip: uint16 already spans 0-65535
+
+        # The CT/MR branches return a fresh LUT result; the other paths
+        # may still alias the reusable working frame, which the next
+        # generate_image call would overwrite, so hand out a copy
+        frames = getattr(self._scratch, "frames", None)
+        if frames is not None and image is frames.get(image.shape):
+            image = image.copy()
+        return image
     
-    def _add_burnt_in_text(self, image: np.ndarray, metadata: Dict[str, Any], modality: str) -> np.ndarray:
-        """Add burnt-in text with DICOM metadata to the image."""
-        try:
-            # Store original image properties
-            original_dtype = image.dtype
-            original_min = image.min()
-            original_max = image.max()
-            
-            # Normalize to 0-255 range for PIL while preserving relative intensities
-            if original_max > original_min:
-                normalized_image = ((image - original_min) / (original_max - original_min) * 255).astype(np.uint8)
-            else:
-                normalized_image = np.zeros_like(image, dtype=np.uint8)
-            
-            pil_image = Image.fromarray(normalized_image, mode='L')
-            draw = ImageDraw.Draw(pil_image)
-            
-            # Try to use a system font, fallback to default
-            try:
-                font_size = max(12, min(image.shape[0], image.shape[1]) // 40)
-                font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", font_size)
-            except (OSError, IOError):
-                try:
-                    font = ImageFont.truetype("arial.ttf", font_size)
-                except (OSError, IOError):
-                    font = ImageFont.load_default()
-            
-            # Extract metadata
-            patient_name = str(metadata.get('PatientName', 'Unknown'))
-            patient_id = str(metadata.get('PatientID', 'Unknown'))
-            patient_dob = str(metadata.get('PatientBirthDate', 'Unknown'))
-            study_uid = str(metadata.get('StudyInstanceUID', 'Unknown'))
-            series_uid = str(metadata.get('SeriesInstanceUID', 'Unknown'))
-            modality_text = str(metadata.get('Modality', modality))
-            study_date = str(metadata.get('StudyDate', 'Unknown'))
-            accession_number = str(metadata.get('AccessionNumber', 'Unknown'))
-            
-            # Format date if it's in YYYYMMDD format
-            if len(study_date) == 8 and study_date.isdigit():
-                formatted_date = f"{study_date[:4]}-{study_date[4:6]}-{study_date[6:8]}"
-            else:
-                formatted_date = study_date
-            
-            # Format DOB if it's in YYYYMMDD format
-            if len(patient_dob) == 8 and patient_dob.isdigit():
-                formatted_dob = f"{patient_dob[:4]}-{patient_dob[4:6]}-{patient_dob[6:8]}"
-            else:
-                formatted_dob = patient_dob
-            
-            # Prepare text lines
-            text_lines = [
-                f"Patient: {patient_name}",
-                f"ID: {patient_id}",
-                f"DOB: {formatted_dob}",
-                f"Study: {study_uid[:20]}...",
-                f"Series: {series_uid[:20]}...",
-                f"Modality: {modality_text}",
-                f"Date: {formatted_date}",
-                f"Accession: {accession_number}"
-            ]
-            
-            # Calculate text position (top-left corner with margin)
-            margin = 10
-            line_height = font_size + 2
-            text_color = 255  # White text
-            
-            # Add text background for better visibility
-            text_width = max(len(line) for line in text_lines) * (font_size // 2)
-            text_height = len(text_lines) * line_height
-            draw.rectangle([margin, margin, margin + text_width + 10, margin + text_height + 5], 
-                          fill=0, outline=128)  # Black background with gray border
-            
-            # Draw text lines
-            for i, line in enumerate(text_lines):
-                y_pos = margin + 5 + i * line_height
-                draw.text((margin + 5, y_pos), line, fill=text_color, font=font)
-            
-            # Convert back to numpy array
-            text_overlay = np.array(pil_image, dtype=np.uint8)
-            
-            # Convert back to original bit depth and range
-            if original_dtype == np.uint16:
-                # Scale back to original range
-                if original_max > original_min:
-                    text_overlay = ((text_overlay / 255.0) * (original_max - original_min) + original_min).astype(np.uint16)
-                else:
-                    text_overlay = np.full_like(image, original_min, dtype=np.uint16)
+    def _get_font(self, font_size: int) -> ImageFont.ImageFont:
+        """Return a font for the size, loading each size at most once."""
+        font = self._font_cache.get(font_size)
+        if font is None:
+            if _FONT_PATH is not None:
+                font = ImageFont.truetype(_FONT_PATH, font_size)
             else:
-                text_overlay = text_overlay.astype(original_dtype)
-            
-            return text_overlay
-            
-        except Exception as e:
-            # If text overlay fails, return original image
-            print(f"Warning: Failed to add burnt-in text: {e}")
+                font = ImageFont.load_default()
+            self._font_cache[font_size] = font
+        return font
+
+    # Metadata keys whose values make the overlay worth rendering; with
+    # none of them set, every line would read "Unknown"
+    _CORE_TEXT_FIELDS = ('PatientName', 'PatientID', 'PatientBirthDate',
+                         'StudyInstanceUID', 'SeriesInstanceUID',
+                         'StudyDate', 'AccessionNumber')
+
+    def _add_burnt_in_text(self, image: np.ndarray, metadata: Dict[str, Any], modality: str) -> np.ndarray:
+        """Add burnt-in text with DICOM metadata to the image.
+
+        Only the overlay's bounding box is rendered and composited: the
+        text block sits in the top-left corner, so drawing it on a small
+        patch and blitting with np.maximum leaves the rest of the frame
+        untouched, instead of round-tripping the whole image through a
+        uint8 normalize / PIL draw / rescale cycle that also quantized
+        every pixel to 8 bits. An effectively empty metadata dict skips
+        the overlay entirely. Font loading is the only operation here
+        that can fail, and _get_font already falls back internally, so
+        no blanket exception handler is needed.
+        """
+        if not any(metadata.get(k) for k in self._CORE_TEXT_FIELDS):
             return image
+
+        font_size = max(12, min(image.shape[0], image.shape[1]) // 40)
+        font = self._get_font(font_size)
+
+        # Extract metadata
+        patient_name = str(metadata.get('PatientName', 'Unknown'))
+        patient_id = str(metadata.get('PatientID', 'Unknown'))
+        patient_dob = str(metadata.get('PatientBirthDate', 'Unknown'))
+        study_uid = str(metadata.get('StudyInstanceUID', 'Unknown'))
+        series_uid = str(metadata.get('SeriesInstanceUID', 'Unknown'))
+        modality_text = str(metadata.get('Modality', modality))
+        study_date = str(metadata.get('StudyDate', 'Unknown'))
+        accession_number = str(metadata.get('AccessionNumber', 'Unknown'))
+
+        # Format date if it's in YYYYMMDD format
+        if len(study_date) == 8 and study_date.isdigit():
+            formatted_date = f"{study_date[:4]}-{study_date[4:6]}-{study_date[6:8]}"
+        else:
+            formatted_date = study_date
+
+        # Format DOB if it's in YYYYMMDD format
+        if len(patient_dob) == 8 and patient_dob.isdigit():
+            formatted_dob = f"{patient_dob[:4]}-{patient_dob[4:6]}-{patient_dob[6:8]}"
+        else:
+            formatted_dob = patient_dob
+
+        # Prepare text lines
+        text_lines = [
+            f"Patient: {patient_name}",
+            f"ID: {patient_id}",
+            f"DOB: {formatted_dob}",
+            f"Study: {study_uid[:20]}...",
+            f"Series: {series_uid[:20]}...",
+            f"Modality: {modality_text}",
+            f"Date: {formatted_date}",
+            f"Accession: {accession_number}"
+        ]
+
+        # Calculate text position (top-left corner with margin)
+        margin = 10
+        line_height = font_size + 2
+        text_color = 255  # White text
+
+        # Overlay bounding box, clipped to the frame
+        text_width = max(len(line) for line in text_lines) * (font_size // 2)
+        text_height = len(text_lines) * line_height
+        patch_w = min(text_width + 11, image.shape[1] - margin)
+        patch_h = min(text_height + 6, image.shape[0] - margin)
+        if patch_w <= 0 or patch_h <= 0:
+            return image
+
+        cache_key = (font_size, patch_w, patch_h, image.dtype.str,
+                     tuple(text_lines))
+        overlay = self._overlay_cache.get(cache_key)
+        if overlay is None:
+            # Render rectangle border and text on a patch of just
+            # that size; fill stays 0 so the underlying image shows
+            # through everywhere the maximum-blit below doesn't
+            # brighten
+            patch = Image.new('L', (patch_w, patch_h), 0)
+            draw = ImageDraw.Draw(patch)
+            draw.rectangle([0, 0, patch_w - 1, patch_h - 1],
+                          fill=0, outline=128)  # Gray border
+            for i, line in enumerate(text_lines):
+                draw.text((5, 5 + i * line_height), line, fill=text_color, font=font)
+
+            overlay = np.asarray(patch, dtype=image.dtype)
+            if image.dtype == np.uint16:
+                overlay = overlay * np.uint16(257)  # Spread 0-255 over 0-65535
+            if len(self._overlay_cache) >= 8:
+                self._overlay_cache.clear()
+            self._overlay_cache[cache_key] = overlay
+
+        region = image[margin:margin + patch_h, margin:margin + patch_w]
+        np.maximum(region, overlay, out=region)
+        return image
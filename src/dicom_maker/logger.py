@@ -30,6 +30,10 @@ class DICOMMakerLogger:
         """
         self.logger = logging.getLogger("dicom_maker")
         self.logger.setLevel(getattr(logging, log_level.upper()))
+
+        # Only decorate messages with ANSI colors when stdout is a
+        # terminal; redirected output gets plain text
+        self._use_color = sys.stdout.isatty()
         
         # Clear any existing handlers
         self.logger.handlers.clear()
@@ -47,8 +51,12 @@ class DICOMMakerLogger:
     
     def _create_cli_formatter(self) -> logging.Formatter:
         """Create formatter for CLI output with colors."""
+        use_color = self._use_color
+
         class ColoredFormatter(logging.Formatter):
             def format(self, record):
+                if not use_color:
+                    return super().format(record)
                 # Add color based on log level
                 if record.levelno >= logging.ERROR:
                     record.levelname = f"{Fore.RED}{record.levelname}{Style.RESET_ALL}"
@@ -89,44 +97,66 @@ class DICOMMakerLogger:
         file_handler.setFormatter(self.file_formatter)
         self.logger.addHandler(file_handler)
     
-    def debug(self, message: str, **kwargs):
+    def debug(self, message: str, *args, **kwargs):
         """Log debug message."""
-        self.logger.debug(message, **kwargs)
-    
-    def info(self, message: str, **kwargs):
+        self.logger.debug(message, *args, **kwargs)
+
+    def info(self, message: str, *args, **kwargs):
         """Log info message."""
-        self.logger.info(message, **kwargs)
-    
-    def warning(self, message: str, **kwargs):
+        self.logger.info(message, *args, **kwargs)
+
+    def warning(self, message: str, *args, **kwargs):
         """Log warning message."""
-        self.logger.warning(message, **kwargs)
-    
-    def error(self, message: str, **kwargs):
+        self.logger.warning(message, *args, **kwargs)
+
+    def error(self, message: str, *args, **kwargs):
         """Log error message."""
-        self.logger.error(message, **kwargs)
-    
-    def critical(self, message: str, **kwargs):
+        self.logger.error(message, *args, **kwargs)
+
+    def critical(self, message: str, *args, **kwargs):
         """Log critical message."""
-        self.logger.critical(message, **kwargs)
-    
-    def success(self, message: str, **kwargs):
+        self.logger.critical(message, *args, **kwargs)
+
+    def success(self, message: str, *args, **kwargs):
         """Log success message with special formatting."""
-        self.logger.info(f"{Fore.GREEN}✓ {message}{Style.RESET_ALL}", **kwargs)
-    
-    def failure(self, message: str, **kwargs):
+        # Skip the decoration entirely when the level is suppressed
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        if self._use_color:
+            message = f"{Fore.GREEN}✓ {message}{Style.RESET_ALL}"
+        else:
+            message = f"✓ {message}"
+        self.logger.info(message, *args, **kwargs)
+
+    def failure(self, message: str, *args, **kwargs):
         """Log failure message with special formatting."""
-        self.logger.error(f"{Fore.RED}✗ {message}{Style.RESET_ALL}", **kwargs)
-    
-    def progress(self, message: str, **kwargs):
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
+        if self._use_color:
+            message = f"{Fore.RED}✗ {message}{Style.RESET_ALL}"
+        else:
+            message = f"✗ {message}"
+        self.logger.error(message, *args, **kwargs)
+
+    def progress(self, message: str, *args, **kwargs):
         """Log progress message with special formatting."""
-        self.logger.info(f"{Fore.CYAN}→ {message}{Style.RESET_ALL}", **kwargs)
-    
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        if self._use_color:
+            message = f"{Fore.CYAN}→ {message}{Style.RESET_ALL}"
+        else:
+            message = f"→ {message}"
+        self.logger.info(message, *args, **kwargs)
+
     def generated_data(self, field_name: str, value: str, **kwargs):
         """Log when data is automatically generated."""
-        self.logger.warning(
-            f"{Fore.YELLOW}Generated {field_name}: {value}{Style.RESET_ALL}", 
-            **kwargs
-        )
+        if not self.logger.isEnabledFor(logging.WARNING):
+            return
+        if self._use_color:
+            message = f"{Fore.YELLOW}Generated {field_name}: {value}{Style.RESET_ALL}"
+        else:
+            message = f"Generated {field_name}: {value}"
+        self.logger.warning(message, **kwargs)
 
 
 # Global logger instance
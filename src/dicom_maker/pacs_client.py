@@ -5,7 +5,7 @@ Copyright (c) 2025 flatmapit.com
 Licensed under the MIT License
 """
 
-import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Any
 from pynetdicom import AE
 from pynetdicom.sop_class import (
@@ -17,63 +17,95 @@ from pynetdicom.sop_class import (
 )
 from pydicom.dataset import Dataset
 
+from .logger import get_logger
+
 
 class PACSClient:
     """Client for communicating with PACS systems."""
     
-    def __init__(self, host: str, port: int, aec: str, aet: str):
+    def __init__(self, host: str, port: int, aec: str, aet: str,
+                 max_associations: int = 1):
         """
         Initialize PACS client.
-        
+
         Args:
             host: PACS host address
             port: PACS port number
             aec: Application Entity Caller (our AE title)
             aet: Application Entity Title (PACS AE title)
+            max_associations: Number of parallel associations to use when
+                sending a study (1 = serial, the default)
         """
         self.host = host
         self.port = port
         self.aec = aec
         self.aet = aet
         self.ae = None
+        self.max_associations = max(1, max_associations)
+
+        # Configured AEs cached by negotiated SOP class set, plus an
+        # optional long-lived association for context-managed use
+        self._ae_cache: Dict[Any, AE] = {}
+        self._assoc = None
+        self._persistent = False
         
-        # Set up logging
-        logging.basicConfig(level=logging.INFO)
-        self.logger = logging.getLogger(__name__)
+        # Shared application logger -- configuration is centralized in
+        # setup_logging, so no per-instance handler setup here
+        self.logger = get_logger()
     
-    def _create_ae(self) -> AE:
-        """Create and configure Application Entity."""
-        # Always create a new AE to avoid UID issues
+    # Storage SOP classes negotiated when no specific set is requested
+    DEFAULT_STORAGE_CLASSES = (
+        CTImageStorage,
+        MRImageStorage,
+        ComputedRadiographyImageStorage,
+        DigitalMammographyXRayImageStorageForPresentation,
+        DigitalXRayImageStorageForPresentation,
+        UltrasoundImageStorage,
+    )
+
+    def _create_ae(self, sop_class_uids: Optional[set] = None) -> AE:
+        """
+        Create and configure Application Entity.
+
+        Args:
+            sop_class_uids: SOP Class UIDs to negotiate storage contexts
+                for; when None, the default storage classes are added
+
+        Returns:
+            Configured AE
+        """
+        # Reuse a previously configured AE for the same context set
+        cache_key = frozenset(sop_class_uids) if sop_class_uids else None
+        cached = self._ae_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # Ensure AE titles are strings and properly formatted
         aec_title = str(self.aec).strip()
         if len(aec_title) > 16:
             aec_title = aec_title[:16]
-        
+
         ae = AE(ae_title=aec_title)
-        
+
         # Add requested presentation contexts
         from pydicom.uid import ImplicitVRLittleEndian
-        
-        # Add verification context (both supported and requested)
-        ae.add_supported_context(Verification, ImplicitVRLittleEndian)
+
+        # The client only ever acts as SCU, so requested contexts are all
+        # that is needed -- supported contexts are for SCP roles
         ae.add_requested_context(Verification, ImplicitVRLittleEndian)
-        
-        # Add storage contexts (both supported and requested)
-        # Note: StorageServiceClass is a class, not a UID string
-        # We'll add specific SOP classes instead
-        ae.add_supported_context(CTImageStorage, ImplicitVRLittleEndian)
-        ae.add_requested_context(CTImageStorage, ImplicitVRLittleEndian)
-        ae.add_supported_context(MRImageStorage, ImplicitVRLittleEndian)
-        ae.add_requested_context(MRImageStorage, ImplicitVRLittleEndian)
-        ae.add_supported_context(ComputedRadiographyImageStorage, ImplicitVRLittleEndian)
-        ae.add_requested_context(ComputedRadiographyImageStorage, ImplicitVRLittleEndian)
-        ae.add_supported_context(DigitalMammographyXRayImageStorageForPresentation, ImplicitVRLittleEndian)
-        ae.add_requested_context(DigitalMammographyXRayImageStorageForPresentation, ImplicitVRLittleEndian)
-        ae.add_supported_context(DigitalXRayImageStorageForPresentation, ImplicitVRLittleEndian)
-        ae.add_requested_context(DigitalXRayImageStorageForPresentation, ImplicitVRLittleEndian)
-        ae.add_supported_context(UltrasoundImageStorage, ImplicitVRLittleEndian)
-        ae.add_requested_context(UltrasoundImageStorage, ImplicitVRLittleEndian)
-        
+
+        # Add storage contexts, limited to the SOP classes actually present
+        # when the caller knows them -- fewer contexts keep the
+        # A-ASSOCIATE PDUs small
+        if sop_class_uids:
+            storage_classes = sorted(sop_class_uids)
+        else:
+            storage_classes = self.DEFAULT_STORAGE_CLASSES
+
+        for sop_class in storage_classes:
+            ae.add_requested_context(sop_class, ImplicitVRLittleEndian)
+
+        self._ae_cache[cache_key] = ae
         return ae
     
     def _ensure_string_uids(self, dataset):
@@ -90,6 +122,50 @@ class PACSClient:
                 if value is not None:
                     setattr(dataset, field, str(value))
     
+    def _associate(self, ae: AE):
+        """Open an association with the PACS using the configured AE title."""
+        aet_title = str(self.aet).strip()
+        if len(aet_title) > 16:
+            aet_title = aet_title[:16]
+        return ae.associate(self.host, self.port, ae_title=aet_title)
+
+    def __enter__(self):
+        """Enter context-managed use: associations are kept open for reuse."""
+        self._persistent = True
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def close(self):
+        """Release any long-lived association held by the client."""
+        if self._assoc is not None and self._assoc.is_established:
+            self._assoc.release()
+        self._assoc = None
+        self._persistent = False
+
+    def _acquire_association(self, sop_class_uids: Optional[set] = None):
+        """
+        Get an established association for a single operation.
+
+        In context-managed (persistent) use, a single association covering
+        the default contexts is opened once and reused; otherwise a fresh
+        one is created per call.
+
+        Returns:
+            (association, transient) -- transient is True when the caller
+            is responsible for releasing the association
+        """
+        if self._persistent:
+            if self._assoc is None or not self._assoc.is_established:
+                # Negotiate the full default set so the association can
+                # serve any follow-up operation
+                self._assoc = self._associate(self._create_ae())
+            return self._assoc, False
+
+        return self._associate(self._create_ae(sop_class_uids)), True
+
     def verify_connection(self) -> bool:
         """
         Verify connection to PACS using C-ECHO.
@@ -98,93 +174,200 @@ class PACSClient:
             True if connection successful, False otherwise
         """
         try:
-            ae = self._create_ae()
-            
             # Associate with PACS
-            aet_title = str(self.aet).strip()
-            if len(aet_title) > 16:
-                aet_title = aet_title[:16]
-            assoc = ae.associate(self.host, self.port, ae_title=aet_title)
-            
+            assoc, transient = self._acquire_association()
+
             if assoc.is_established:
                 # Send C-ECHO request
                 status = assoc.send_c_echo()
-                
-                # Release association
-                assoc.release()
-                
+
+                # Release association unless it is being kept for reuse
+                if transient:
+                    assoc.release()
+
                 if status.Status == 0x0000:  # Success
                     self.logger.info("C-ECHO successful")
                     return True
                 else:
-                    self.logger.error(f"C-ECHO failed with status: {status.Status}")
+                    self.logger.error("C-ECHO failed with status: %s", status.Status)
                     return False
             else:
                 self.logger.error("Failed to establish association")
                 return False
-                
+
         except Exception as e:
-            self.logger.error(f"Connection verification failed: {e}")
+            self.logger.error("Connection verification failed: %s", e)
             return False
     
-    def send_study(self, study_data: Dict[str, Any]) -> bool:
+    def send_study(self, study_data: Dict[str, Any], verify_first: bool = False) -> bool:
         """
         Send a DICOM study to PACS using C-STORE.
-        
+
         Args:
             study_data: Study data containing series and images
-            
+            verify_first: Issue a C-ECHO on the send association before
+                storing, instead of a separate verification association
+
         Returns:
             True if all images sent successfully, False otherwise
         """
         try:
-            ae = self._create_ae()
-            
-            # Associate with PACS
-            aet_title = str(self.aet).strip()
-            if len(aet_title) > 16:
-                aet_title = aet_title[:16]
-            assoc = ae.associate(self.host, self.port, ae_title=aet_title)
-            
-            if not assoc.is_established:
-                self.logger.error("Failed to establish association")
-                return False
-            
-            success_count = 0
-            total_count = 0
-            
-            # Send all images in the study
-            for series in study_data.get("series", []):
-                for image in series.get("images", []):
-                    total_count += 1
-                    
-                    # Ensure UIDs are strings for pynetdicom compatibility
-                    self._ensure_string_uids(image)
-                    
-                    # Send C-STORE request
-                    status = assoc.send_c_store(image)
-                    
-                    if status.Status == 0x0000:  # Success
-                        success_count += 1
-                        self.logger.info(f"Sent image {image.SOPInstanceUID}")
-                    else:
-                        self.logger.error(f"Failed to send image {image.SOPInstanceUID}: {status.Status}")
-            
-            # Release association
-            assoc.release()
-            
+            # Flatten the study into a single image manifest, built once and
+            # reused for counting, context negotiation, and sending
+            images = [image
+                      for series in study_data.get("series", [])
+                      for image in series.get("images", [])]
+
+            # Ensure UIDs are strings for pynetdicom compatibility
+            for image in images:
+                self._ensure_string_uids(image)
+
+            total_count = len(images)
+
+            # Group images by SOP class so send_c_store's presentation
+            # context lookup keeps hitting the same accepted context
+            images.sort(key=lambda image: str(getattr(image, "SOPClassUID", "")))
+
+            # Precompute the SOP Instance UID for each image so the send
+            # loop logs without a pydicom tag lookup per access
+            entries = [(image, getattr(image, "SOPInstanceUID", "<unknown>"))
+                       for image in images]
+
+            # Negotiate only the presentation contexts the study needs
+            sop_class_uids = {str(image.SOPClassUID) for image in images
+                              if hasattr(image, "SOPClassUID")}
+            ae = self._create_ae(sop_class_uids)
+
+            if self.max_associations > 1 and total_count > 1:
+                # Shard images round-robin over parallel associations so
+                # C-STORE round-trips overlap instead of serializing
+                workers = min(self.max_associations, total_count)
+                shards = [entries[i::workers] for i in range(workers)]
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    # Only the first shard's association needs to verify
+                    futures = [executor.submit(self._send_images, ae, shard,
+                                               verify_first and idx == 0)
+                               for idx, shard in enumerate(shards)]
+                    success_count = sum(f.result() for f in futures)
+            else:
+                success_count = self._send_images(ae, entries, verify_first)
+
             success = success_count == total_count
             if success:
-                self.logger.info(f"Successfully sent {success_count}/{total_count} images")
+                self.logger.info("Successfully sent %d/%d images", success_count, total_count)
             else:
-                self.logger.error(f"Only sent {success_count}/{total_count} images")
+                self.logger.error("Only sent %d/%d images", success_count, total_count)
             
             return success
-            
+
         except Exception as e:
-            self.logger.error(f"Failed to send study: {e}")
+            self.logger.error("Failed to send study: %s", e)
             return False
-    
+
+    def _send_images(self, ae: AE, entries: List[tuple], verify_first: bool = False) -> int:
+        """
+        Send a list of images over a single association.
+
+        Args:
+            ae: Application Entity to associate with
+            entries: (dataset, sop_instance_uid) pairs to send
+            verify_first: Issue a C-ECHO before the first C-STORE
+
+        Returns:
+            Number of images sent successfully
+        """
+        if not entries:
+            return 0
+
+        assoc = self._associate(ae)
+
+        if not assoc.is_established:
+            self.logger.error("Failed to establish association")
+            return 0
+
+        if verify_first:
+            # Verify on the association we are about to use rather than
+            # paying for a separate associate/echo/release round trip
+            echo_status = assoc.send_c_echo()
+            if echo_status.Status != 0x0000:
+                self.logger.error("C-ECHO failed with status: %s", echo_status.Status)
+                assoc.release()
+                return 0
+            self.logger.info("C-ECHO successful")
+
+        success_count = self._store_entries(assoc, entries)
+
+        # Release association
+        assoc.release()
+
+        return success_count
+
+    def _store_entries(self, assoc, entries: List[tuple]) -> int:
+        """Issue C-STOREs for (dataset, sop_instance_uid) pairs on assoc."""
+        success_count = 0
+        n_images = len(entries)
+
+        for idx, (image, sop_uid) in enumerate(entries, 1):
+            # Send C-STORE request
+            status = assoc.send_c_store(image)
+
+            if status.Status == 0x0000:  # Success
+                success_count += 1
+                # Rate-limit progress output so logging stays off the hot
+                # path; errors are still reported per image
+                if idx % 100 == 0 or idx == n_images:
+                    self.logger.info("Sent %d/%d images", idx, n_images)
+            else:
+                self.logger.error("Failed to send image %s: %s", sop_uid, status.Status)
+
+        return success_count
+
+    def send_images(self, datasets: List[Dataset]) -> bool:
+        """
+        Send a list of DICOM images, pipelining all C-STOREs on one
+        association instead of associating per image.
+
+        In context-managed use the client's long-lived association is
+        reused; otherwise one association is opened for the batch and
+        released afterwards.
+
+        Args:
+            datasets: DICOM datasets to send
+
+        Returns:
+            True if all images sent successfully, False otherwise
+        """
+        if not datasets:
+            return True
+
+        try:
+            for image in datasets:
+                self._ensure_string_uids(image)
+
+            # Group by SOP class so the accepted-context lookup stays hot
+            datasets = sorted(datasets,
+                              key=lambda image: str(getattr(image, "SOPClassUID", "")))
+            entries = [(image, getattr(image, "SOPInstanceUID", "<unknown>"))
+                       for image in datasets]
+
+            if self._persistent:
+                assoc, _ = self._acquire_association()
+                if not assoc.is_established:
+                    self.logger.error("Failed to establish association")
+                    return False
+                success_count = self._store_entries(assoc, entries)
+            else:
+                sop_class_uids = {str(image.SOPClassUID) for image in datasets
+                                  if hasattr(image, "SOPClassUID")}
+                success_count = self._send_images(self._create_ae(sop_class_uids),
+                                                  entries)
+
+            return success_count == len(entries)
+
+        except Exception as e:
+            self.logger.error("Failed to send images: %s", e)
+            return False
+
     def send_image(self, image_dataset: Dataset) -> bool:
         """
         Send a single DICOM image to PACS.
@@ -196,31 +379,32 @@ class PACSClient:
             True if sent successfully, False otherwise
         """
         try:
-            ae = self._create_ae()
-            
+            if hasattr(image_dataset, "SOPClassUID"):
+                sop_class_uids = {str(image_dataset.SOPClassUID)}
+            else:
+                sop_class_uids = None
+
             # Associate with PACS
-            aet_title = str(self.aet).strip()
-            if len(aet_title) > 16:
-                aet_title = aet_title[:16]
-            assoc = ae.associate(self.host, self.port, ae_title=aet_title)
-            
+            assoc, transient = self._acquire_association(sop_class_uids)
+
             if not assoc.is_established:
                 self.logger.error("Failed to establish association")
                 return False
-            
+
             # Send C-STORE request
             status = assoc.send_c_store(image_dataset)
-            
-            # Release association
-            assoc.release()
-            
+
+            # Release association unless it is being kept for reuse
+            if transient:
+                assoc.release()
+
             if status.Status == 0x0000:  # Success
-                self.logger.info(f"Successfully sent image {image_dataset.SOPInstanceUID}")
+                self.logger.info("Successfully sent image %s", image_dataset.SOPInstanceUID)
                 return True
             else:
-                self.logger.error(f"Failed to send image: {status.Status}")
+                self.logger.error("Failed to send image: %s", status.Status)
                 return False
                 
         except Exception as e:
-            self.logger.error(f"Failed to send image: {e}")
+            self.logger.error("Failed to send image: %s", e)
             return False
@@ -5,17 +5,60 @@ Copyright (c) 2025 flatmapit.com
 Licensed under the MIT License
 """
 
+import mmap
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 import pydicom
 from pydicom.dataset import Dataset
+from pydicom.errors import InvalidDicomError
+
+from .logger import get_logger
+
+# orjson is an optional accelerator for metadata (de)serialization;
+# fall back to the stdlib json module when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 class StudyManager:
-    """Manages local DICOM study storage and retrieval."""
-    
+    """Manages local DICOM study storage and retrieval.
+
+    Used as a context manager, metadata writes are batched: studies.json
+    is rewritten once on exit instead of after every save, so saving
+    many studies in a loop stays O(N)::
+
+        with StudyManager() as sm:
+            for uid, data in studies:
+                sm.save_study(uid, data)
+    """
+
+    # Defer reading of elements larger than this (notably PixelData) until
+    # they are actually accessed, so loading a study stays cheap
+    DEFER_SIZE = 1 << 20  # 1 MB
+
+    # Process-wide cache of loaded studies so back-to-back loads of the
+    # same study (test loops, CI harnesses) skip re-parsing every instance
+    _study_cache: Dict[tuple, Dict[str, Any]] = {}
+
+    # Parsed datasets keyed by (path, mtime_ns, size, load_pixels):
+    # after a study-cache invalidation, reloads skip re-parsing files
+    # that did not change on disk. A rewrite moves the mtime/size, so
+    # stale entries simply stop matching; the dict is cleared when it
+    # outgrows its bound rather than tracking LRU order
+    _dcm_cache: Dict[tuple, Dataset] = {}
+    _DCM_CACHE_MAX = 4096
+
+    # Buffer size for DICOM writes: PixelData dominates the file body,
+    # and a 1 MB buffer turns each save into a handful of write syscalls
+    # instead of hundreds through the default small buffer
+    WRITE_BUFFER_SIZE = 1 << 20
+
     def __init__(self, base_dir: str = "studies"):
         """
         Initialize study manager.
@@ -25,24 +68,142 @@ class StudyManager:
         """
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(exist_ok=True)
+        self.logger = get_logger()
         
-        # Create metadata file path
+        # Create metadata file path; the file itself is read lazily on
+        # first metadata access, so construction stays constant-time no
+        # matter how large studies.json has grown
         self.metadata_file = self.base_dir / "studies.json"
-        self._load_metadata()
-    
+        self._metadata: Optional[Dict[str, Any]] = None
+
+        # Context-managed use defers studies.json rewrites to one flush
+        self._batch_mode = False
+        self._dirty = False
+
+        # Series directories already created by this manager; repeated
+        # saves into the same series skip the mkdir syscall entirely
+        self._known_dirs: set = set()
+
+        # list_studies memoization: the copy is rebuilt only when the
+        # metadata version moves, so polling callers share one snapshot
+        self._metadata_version = 0
+        self._list_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._list_cache_version = -1
+
+    def __enter__(self):
+        """Enter batch mode: metadata persists once, on exit or flush."""
+        self._batch_mode = True
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._batch_mode = False
+        self.flush()
+        return False
+
+    def flush(self):
+        """Write the metadata index out if any change is pending."""
+        if self._dirty:
+            self._save_metadata()
+            self._dirty = False
+
+    def _persist_metadata(self):
+        """Save the index now, or mark it dirty while in batch mode."""
+        self._metadata_version += 1
+        if self._batch_mode:
+            self._dirty = True
+        else:
+            self._save_metadata()
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Study metadata dict, loaded from studies.json on first access."""
+        if self._metadata is None:
+            self._load_metadata()
+        return self._metadata
+
     def _load_metadata(self):
         """Load study metadata from file."""
         if self.metadata_file.exists():
-            with open(self.metadata_file, 'r') as f:
-                self.metadata = json.load(f)
+            if orjson is not None:
+                # Map the file instead of read()ing it: orjson parses
+                # straight out of the page cache with no intermediate
+                # bytes copy of the whole index
+                with open(self.metadata_file, 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    if size:
+                        with mmap.mmap(f.fileno(), 0,
+                                       access=mmap.ACCESS_READ) as mm:
+                            self._metadata = orjson.loads(memoryview(mm))
+                    else:
+                        self._metadata = {}
+            else:
+                with open(self.metadata_file, 'r') as f:
+                    self._metadata = json.load(f)
         else:
-            self.metadata = {}
-    
+            self._metadata = {}
+
     def _save_metadata(self):
-        """Save study metadata to file."""
-        with open(self.metadata_file, 'w') as f:
-            json.dump(self.metadata, f, indent=2)
+        """Save study metadata to file.
+
+        The JSON is written to a sibling temp file and renamed into
+        place, so a crash mid-write leaves the previous studies.json
+        intact instead of a truncated one.
+        """
+        tmp = self.metadata_file.with_suffix('.json.tmp')
+        if orjson is not None:
+            with open(tmp, 'wb') as f:
+                # Study UIDs are pydicom UID instances (str subclasses), so
+                # allow non-str keys and stringify anything else
+                f.write(orjson.dumps(self.metadata, default=str,
+                                     option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(tmp, 'w') as f:
+                json.dump(self.metadata, f, indent=2)
+        os.replace(tmp, self.metadata_file)
     
+    def _cache_key(self, study_uid: str, load_pixels: bool = True) -> tuple:
+        """Build the study-cache key for a study in this manager's base dir."""
+        return (str(self.base_dir), str(study_uid), load_pixels)
+
+    def _invalidate_cache(self, study_uid: str):
+        """Drop a study from the process-wide cache after it changes on disk."""
+        for load_pixels in (True, False):
+            self._study_cache.pop(self._cache_key(study_uid, load_pixels), None)
+
+    def _write_dataset(self, filepath, image: Dataset):
+        """Write one dataset (path or str target) through a large buffer."""
+        with open(filepath, 'wb', buffering=self.WRITE_BUFFER_SIZE) as fp:
+            image.save_as(fp)
+
+    # Per-study metadata sidecar: each study directory carries its own
+    # summary, so a study stays self-describing even when its directory
+    # is copied into a base dir whose studies.json has never seen it.
+    # studies.json remains the index that makes list_studies one read.
+    SIDECAR_NAME = "_meta.json"
+
+    def _write_sidecar(self, study_uid: str, entry: Dict[str, Any]):
+        """Write a study's metadata summary next to its series dirs."""
+        sidecar = self.base_dir / study_uid / self.SIDECAR_NAME
+        if orjson is not None:
+            with open(sidecar, 'wb') as f:
+                f.write(orjson.dumps(entry, default=str,
+                                     option=orjson.OPT_INDENT_2))
+        else:
+            with open(sidecar, 'w') as f:
+                json.dump(entry, f, indent=2, default=str)
+
+    def _read_sidecar(self, study_uid: str) -> Optional[Dict[str, Any]]:
+        """Read a study's sidecar summary, or None if it has none."""
+        sidecar = self.base_dir / study_uid / self.SIDECAR_NAME
+        try:
+            if orjson is not None:
+                with open(sidecar, 'rb') as f:
+                    return orjson.loads(f.read())
+            with open(sidecar, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
     def save_study(self, study_uid: str, study_data: Dict[str, Any]) -> bool:
         """
         Save a study to local storage.
@@ -59,92 +220,264 @@ class StudyManager:
             study_dir = self.base_dir / study_uid
             study_dir.mkdir(exist_ok=True)
             
-            # Save each image as a DICOM file
+            # Collect every (path, dataset) pair first, then write them on
+            # a thread pool shared across all series: the writes are
+            # I/O-bound and release the GIL, so large studies overlap
+            # their syscalls instead of serializing
+            # Count series and images in the same pass instead of
+            # re-walking the structure for the metadata entry below
+            pending = []
+            series_count = 0
+            total_images = 0
             for series in study_data.get("series", []):
                 series_dir = study_dir / f"series_{series['series_number']}"
-                series_dir.mkdir(exist_ok=True)
-                
+                if str(series_dir) not in self._known_dirs:
+                    series_dir.mkdir(exist_ok=True)
+                    self._known_dirs.add(str(series_dir))
+                series_count += 1
+                total_images += len(series.get("image_paths", []))
+
+                # Format target paths from the series dir string: one
+                # Path stringification per series, not one Path object
+                # plus conversion per image
+                series_prefix = f"{series_dir}{os.sep}"
                 for image in series.get("images", []):
-                    # Save as DICOM file
-                    filename = f"{image.SOPInstanceUID}.dcm"
-                    filepath = series_dir / filename
-                    image.save_as(str(filepath))
+                    pending.append((f"{series_prefix}{image.SOPInstanceUID}.dcm",
+                                    image))
+                    total_images += 1
+
+            if len(pending) > 1:
+                workers = min(32, (os.cpu_count() or 1) * 4, len(pending))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    # list() drains the iterator so any write error
+                    # surfaces here and falls into the except below
+                    list(executor.map(lambda pair: self._write_dataset(*pair),
+                                      pending))
+            else:
+                for filepath, image in pending:
+                    self._write_dataset(filepath, image)
             
             # Update metadata
-            self.metadata[study_uid] = {
+            entry = {
                 "study_uid": study_uid,
                 "patient_id": study_data.get("patient_id"),
                 "patient_name": study_data.get("patient_name"),
                 "study_date": study_data.get("study_date"),
-                "series_count": len(study_data.get("series", [])),
-                "total_images": sum(len(s.get("images", [])) for s in study_data.get("series", [])),
-                "created_at": str(Path().cwd())
+                "series_count": series_count,
+                "total_images": total_images,
+                "created_at": datetime.now(timezone.utc).isoformat()
             }
-            
-            self._save_metadata()
+            self.metadata[study_uid] = entry
+            self._write_sidecar(study_uid, entry)
+
+            self._persist_metadata()
+            self._invalidate_cache(study_uid)
             return True
-            
+
         except Exception as e:
-            print(f"Error saving study {study_uid}: {e}")
+            self.logger.error("Error saving study %s: %s", study_uid, e)
             return False
     
-    def load_study(self, study_uid: str) -> Optional[Dict[str, Any]]:
+    def write_image(self, study_uid: str, series_number: int, image: Dataset) -> str:
+        """
+        Write a single image dataset to a study's storage immediately.
+
+        Used as a writer callback by DICOMGenerator so large studies can be
+        streamed to disk as they are generated instead of being held fully
+        in memory.
+
+        Args:
+            study_uid: Study Instance UID
+            series_number: Series number the image belongs to
+            image: DICOM dataset to write
+
+        Returns:
+            Path of the written DICOM file
+        """
+        series_dir = self.base_dir / study_uid / f"series_{series_number}"
+        if str(series_dir) not in self._known_dirs:
+            series_dir.mkdir(parents=True, exist_ok=True)
+            self._known_dirs.add(str(series_dir))
+
+        filepath = series_dir / f"{image.SOPInstanceUID}.dcm"
+        self._write_dataset(filepath, image)
+        self._invalidate_cache(study_uid)
+        return str(filepath)
+
+    def _read_cached(self, path: str, load_pixels: bool = True) -> Dataset:
+        """Read one DICOM file, reusing the parse if the file is unchanged.
+
+        One stat decides cache validity; a hit skips the whole dcmread
+        parse, a miss (new file, rewrite, or eviction) reads as usual.
+        """
+        st = os.stat(path)
+        key = (path, st.st_mtime_ns, st.st_size, load_pixels)
+        image = self._dcm_cache.get(key)
+        if image is None:
+            image = pydicom.dcmread(path, force=True,
+                                    stop_before_pixels=not load_pixels,
+                                    defer_size=self.DEFER_SIZE)
+            if len(self._dcm_cache) >= self._DCM_CACHE_MAX:
+                self._dcm_cache.clear()
+            self._dcm_cache[key] = image
+        return image
+
+    def load_study(self, study_uid: str,
+                   load_pixels: bool = True) -> Optional[Dict[str, Any]]:
         """
         Load a study from local storage.
-        
+
         Args:
             study_uid: Study Instance UID
-            
+            load_pixels: When False, parsing stops before PixelData, so
+                callers that only need counts or header fields skip
+                reading (and holding) the image bytes entirely
+
         Returns:
             Study data or None if not found
         """
         try:
+            cache_key = self._cache_key(study_uid, load_pixels)
+            cached = self._study_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
             study_dir = self.base_dir / study_uid
-            if not study_dir.exists():
-                return None
-            
+
             study_data = {
                 "study_uid": study_uid,
                 "series": []
             }
             
-            # Load metadata
-            if study_uid in self.metadata:
-                study_data.update(self.metadata[study_uid])
+            # Load metadata from the index, falling back to the study's
+            # own sidecar for directories the index has never seen
+            entry = self.metadata.get(study_uid)
+            if entry is None:
+                entry = self._read_sidecar(study_uid)
+            if entry is not None:
+                study_data.update(entry)
             
-            # Load series and images
-            for series_dir in study_dir.iterdir():
-                if series_dir.is_dir() and series_dir.name.startswith("series_"):
-                    series_number = int(series_dir.name.split("_")[1])
-                    series_data = {
-                        "series_number": series_number,
-                        "images": []
+            # Collect paths first. scandir hands back the dirent type
+            # with each entry, so the name check plus is_dir costs no
+            # extra stat, and the .dcm listing is a suffix test per
+            # entry rather than a glob that re-stats everything. A
+            # missing study directory surfaces here as FileNotFoundError
+            # rather than costing every caller an up-front exists() stat
+            series_paths = []
+            try:
+                with os.scandir(study_dir) as series_entries:
+                    for series_entry in series_entries:
+                        if not (series_entry.name.startswith("series_")
+                                and series_entry.is_dir(follow_symlinks=False)):
+                            continue
+                        series_number = int(series_entry.name.split("_")[1])
+                        with os.scandir(series_entry.path) as dcm_entries:
+                            paths = sorted(
+                                dcm_entry.path for dcm_entry in dcm_entries
+                                if dcm_entry.name.endswith(".dcm"))
+                        series_paths.append((series_number, paths))
+            except FileNotFoundError:
+                return None
+
+            # Read in (series, filename) order: directory order is
+            # arbitrary, and sequential access lets kernel readahead
+            # prefetch ahead of the parsers. Series order in the result
+            # becomes deterministic as a side effect
+            series_paths.sort()
+
+            # Parse all files of the study on one thread pool: dcmread
+            # releases the GIL inside its file reads, so the per-file
+            # I/O overlaps. Failed reads log and drop out, as before
+            def read_one(path):
+                try:
+                    return self._read_cached(path, load_pixels)
+                except (OSError, InvalidDicomError) as e:
+                    self.logger.error("Error loading %s: %s", path, e)
+                    return None
+
+            total = sum(len(paths) for _, paths in series_paths)
+            if total > 1:
+                workers = min(8, total)
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    readers = {
+                        series_number: executor.map(read_one, paths)
+                        for series_number, paths in series_paths
                     }
-                    
-                    # Load images in series
-                    for dcm_file in series_dir.glob("*.dcm"):
-                        try:
-                            image = pydicom.dcmread(str(dcm_file), force=True)
-                            series_data["images"].append(image)
-                        except Exception as e:
-                            print(f"Error loading {dcm_file}: {e}")
-                    
-                    study_data["series"].append(series_data)
-            
+                    loaded = {number: list(images)
+                              for number, images in readers.items()}
+            else:
+                loaded = {number: [read_one(p) for p in paths]
+                          for number, paths in series_paths}
+
+            for series_number, _ in series_paths:
+                study_data["series"].append({
+                    "series_number": series_number,
+                    "images": [img for img in loaded[series_number]
+                               if img is not None],
+                })
+
+            self._study_cache[cache_key] = study_data
             return study_data
-            
+
         except Exception as e:
-            print(f"Error loading study {study_uid}: {e}")
+            self.logger.error("Error loading study %s: %s", study_uid, e)
             return None
     
+    def iter_study(self, study_uid: str, load_pixels: bool = True):
+        """
+        Iterate a study's images lazily as (series_number, dataset) pairs.
+
+        Unlike load_study, nothing is accumulated or cached: each
+        dataset is parsed when the caller reaches it and can be dropped
+        as soon as the caller is done, so arbitrarily large studies
+        stream with near-constant memory. Unreadable files are logged
+        and skipped, matching load_study.
+
+        Args:
+            study_uid: Study Instance UID
+            load_pixels: When False, parsing stops before PixelData
+
+        Yields:
+            (series_number, dataset) tuples, series by series
+        """
+        study_dir = self.base_dir / study_uid
+        try:
+            with os.scandir(study_dir) as series_entries:
+                series_dirs = [(int(entry.name.split("_")[1]), entry.path)
+                               for entry in series_entries
+                               if entry.name.startswith("series_")
+                               and entry.is_dir(follow_symlinks=False)]
+        except FileNotFoundError:
+            return
+
+        # Same sorted order as load_study, for readahead and stable output
+        series_dirs.sort()
+        for series_number, series_path in series_dirs:
+            with os.scandir(series_path) as dcm_entries:
+                paths = sorted(dcm_entry.path for dcm_entry in dcm_entries
+                               if dcm_entry.name.endswith(".dcm"))
+            for path in paths:
+                try:
+                    image = pydicom.dcmread(path, force=True,
+                                            stop_before_pixels=not load_pixels,
+                                            defer_size=self.DEFER_SIZE)
+                except (OSError, InvalidDicomError) as e:
+                    self.logger.error("Error loading %s: %s", path, e)
+                    continue
+                yield series_number, image
+
     def list_studies(self) -> Dict[str, Dict[str, Any]]:
         """
         List all local studies.
-        
+
         Returns:
             Dictionary of study metadata
         """
-        return self.metadata.copy()
+        if (self._list_cache is None
+                or self._list_cache_version != self._metadata_version):
+            self._list_cache = self.metadata.copy()
+            self._list_cache_version = self._metadata_version
+        return self._list_cache
     
     def delete_study(self, study_uid: str) -> bool:
         """
@@ -161,16 +494,23 @@ class StudyManager:
             if study_dir.exists():
                 import shutil
                 shutil.rmtree(study_dir)
+
+            # Forget the deleted study's series dirs so a later save
+            # recreates them
+            prefix = f"{study_dir}{os.sep}"
+            self._known_dirs = {d for d in self._known_dirs
+                                if not d.startswith(prefix)}
             
             # Remove from metadata
             if study_uid in self.metadata:
                 del self.metadata[study_uid]
-                self._save_metadata()
-            
+                self._persist_metadata()
+
+            self._invalidate_cache(study_uid)
             return True
             
         except Exception as e:
-            print(f"Error deleting study {study_uid}: {e}")
+            self.logger.error("Error deleting study %s: %s", study_uid, e)
             return False
     
     def get_study_info(self, study_uid: str) -> Optional[Dict[str, Any]]:
@@ -183,20 +523,44 @@ class StudyManager:
         Returns:
             Study metadata or None if not found
         """
-        return self.metadata.get(study_uid)
+        entry = self.metadata.get(study_uid)
+        if entry is None:
+            entry = self._read_sidecar(study_uid)
+        return entry
     
+    def _has_any_image(self, study_uid: str) -> bool:
+        """Check whether a study directory contains at least one .dcm file.
+
+        A pure directory walk that stops at the first hit, so emptiness
+        checks cost two directory reads instead of parsing every
+        instance through load_study.
+        """
+        study_dir = self.base_dir / study_uid
+        try:
+            with os.scandir(study_dir) as series_entries:
+                for series_entry in series_entries:
+                    if not (series_entry.name.startswith("series_")
+                            and series_entry.is_dir(follow_symlinks=False)):
+                        continue
+                    with os.scandir(series_entry.path) as dcm_entries:
+                        for dcm_entry in dcm_entries:
+                            if dcm_entry.name.endswith(".dcm"):
+                                return True
+        except FileNotFoundError:
+            pass
+        return False
+
     def cleanup_empty_studies(self) -> int:
         """
         Remove studies that have no images.
-        
+
         Returns:
             Number of studies cleaned up
         """
         cleaned = 0
         for study_uid in list(self.metadata.keys()):
-            study_data = self.load_study(study_uid)
-            if not study_data or not study_data.get("series"):
+            if not self._has_any_image(study_uid):
                 if self.delete_study(study_uid):
                     cleaned += 1
-        
+
         return cleaned